@@ -1,31 +1,62 @@
 """LLM Chats - Multi-LLM conversation system."""
+import importlib
+import os
 
 __version__ = "0.1.0"
 __author__ = "LLM Chats"
 __email__ = "llm-chats@example.com"
 __description__ = "A service for multi-LLM conversations to explore topic understanding through discussion"
 
-from .app import main, create_gradio_app
-from .client import BaseLLMClient, LLMClientFactory, Message, ChatResponse
-from .conversation import ConversationManager, ConversationConfig, ConversationState
-from .config import get_config, PlatformConfigs, LLMConfig
+# Public names are resolved on first access (PEP 562) so that importing the
+# package does not pull in gradio/openai until an entrypoint actually needs them.
+_LAZY_EXPORTS = {
+    "main": ".app",
+    "create_gradio_app": ".app",
+    "BaseLLMClient": ".client",
+    "LLMClientFactory": ".client",
+    "Message": ".client",
+    "ChatResponse": ".client",
+    "ConversationManager": ".conversation",
+    "ConversationConfig": ".conversation",
+    "ConversationState": ".conversation",
+    "get_config": ".config",
+    "PlatformConfigs": ".config",
+    "LLMConfig": ".config",
+}
 
 __all__ = [
     "main",
-    "create_gradio_app", 
+    "create_gradio_app",
     "BaseLLMClient",
     "LLMClientFactory",
     "Message",
     "ChatResponse",
     "ConversationManager",
-    "ConversationConfig", 
+    "ConversationConfig",
     "ConversationState",
     "get_config",
     "PlatformConfigs",
     "LLMConfig",
 ]
 
-def main() -> None:
-    """Main entry point for the LLM Chats application."""
-    from .app import main as app_main
-    app_main()
+
+def __getattr__(name: str):
+    """Resolve lazily exported names on first access."""
+    module_name = _LAZY_EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + list(_LAZY_EXPORTS))
+
+
+# Set LLM_CHATS_EAGER_IMPORT=1 to resolve every export at import time (useful in CI
+# to catch broken deferred imports early)
+if os.getenv("LLM_CHATS_EAGER_IMPORT") == "1":
+    for _name in __all__:
+        __getattr__(_name)
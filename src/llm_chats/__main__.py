@@ -0,0 +1,39 @@
+"""Command-line entry point: ``python -m llm_chats``."""
+import sys
+
+
+def cli():
+    """Start the LLM Chats application with friendly startup error reporting."""
+    try:
+        # Set environment variables for offline mode before gradio is imported
+        from .config import apply_offline_env
+        apply_offline_env()
+        
+        # Heavy imports (gradio, openai) only happen here
+        from .app import main as app_main
+        print("✅ 模块导入成功")
+        print("🌐 正在启动Web界面...")
+        print("-" * 50)
+        
+        app_main()
+        
+    except ImportError as e:
+        print(f"❌ 导入错误: {e}")
+        print("🔧 请确保已安装依赖: uv sync")
+        sys.exit(1)
+    except KeyboardInterrupt:
+        print("\n👋 已停止LLM Chats服务")
+    except Exception as e:
+        print(f"❌ 启动失败: {e}")
+        print("\n🔧 故障排除建议:")
+        print("1. 检查网络连接和代理设置")
+        print("2. 尝试关闭VPN或防火墙")
+        print("3. 使用不同方式启动:")
+        print("   - uv run llm-chats")
+        print("   - python main.py")
+        print("   - python -m llm_chats")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    cli()
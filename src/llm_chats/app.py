@@ -1,18 +1,23 @@
 """Gradio application for multi-LLM conversations."""
 import asyncio
+import functools
+import io
 import logging
+import re
+import threading
 import time
-from typing import Dict, List, Tuple, Optional, Any
-import json
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import TYPE_CHECKING, Dict, List, Tuple, Optional, Any
 
-import gradio as gr
+from .config import get_config, apply_offline_env, PLATFORM_DISPLAY_NAMES
 
-from .config import get_config
-from .client import LLMClientFactory, Message
-from .conversation import ConversationManager, ConversationConfig, ConversationState
-from .file_processor import process_uploaded_file, format_file_content_for_context
-from .summarizer import ConversationSummarizer, SummaryConfig
-from .model_updater import ModelUpdater
+# gradio, the LLM clients and the file/summary pipelines are imported where they
+# are first used, so importing this module (tooling, reloads) stays cheap
+if TYPE_CHECKING:
+    import gradio as gr
+    from .conversation import ConversationManager
 
 # Configure logging
 logging.basicConfig(
@@ -21,22 +26,185 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-# Global state
-conversation_manager: Optional[ConversationManager] = None
-available_platforms: List[str] = []
+# 平台图标映射
+PLATFORM_EMOJI = MappingProxyType({
+    "阿里云百炼": "🔵",
+    "火山豆包": "🔴",
+    "月之暗面": "🌙",
+    "DeepSeek": "🤖",
+    "Ollama": "🏠"
+})
+DEFAULT_PLATFORM_EMOJI = "💬"
+_platform_emoji = PLATFORM_EMOJI.get  # Bound once; called for every message on every render
 
-# Global state for caching model information
-_model_info_cache = {}
-_model_info_cache_timestamp = 0
-_model_info_cache_ttl = 300  # 5 minutes cache
+# Application-specific CSS appended to the professional theme
+APP_CSS_OVERRIDES = """
+/* Application-specific overrides */
+.gradio-container {
+    max-width: 100% !important;
+    width: 100% !important;
+    margin: 0 auto !important;
+    padding: 20px !important;
+}
 
+/* Main conversation display area - will use component styles */
 
-def initialize_clients():
+/* Typing cursor animation */
+.typing-cursor {
+    animation: blink 1s infinite;
+    color: var(--primary-color);
+    font-weight: bold;
+}
+
+@keyframes blink {
+    0% { opacity: 1; }
+    50% { opacity: 0; }
+    100% { opacity: 1; }
+}
+
+/* Dark mode specific overrides */
+@media (prefers-color-scheme: dark) {
+    .gradio-container {
+        background-color: #1a1a1a !important;
+    }
+
+    /* Ensure buttons are visible in dark mode */
+    .gradio-container .gr-button {
+        color: var(--text-color) !important;
+    }
+
+    /* Labels and form elements */
+    .gradio-container label {
+        color: var(--text-color) !important;
+    }
+
+    /* Checkboxes and radio buttons */
+    .gradio-container .gr-checkbox,
+    .gradio-container .gr-radio {
+        color: var(--text-color) !important;
+    }
+
+    /* Input fields and textareas */
+    .gradio-container input,
+    .gradio-container textarea,
+    .gradio-container select {
+        color: var(--text-color) !important;
+        background-color: #2a2a2a !important;
+        border-color: var(--border-color) !important;
+    }
+
+    /* Placeholder text */
+    .gradio-container input::placeholder,
+    .gradio-container textarea::placeholder {
+        color: #888888 !important;
+    }
+
+    /* Gradio specific elements */
+    .gradio-container .gr-form,
+    .gradio-container .gr-box,
+    .gradio-container .gr-panel {
+        background-color: #2a2a2a !important;
+    }
+
+    /* Markdown and text content */
+    .gradio-container .gr-markdown {
+        color: var(--text-color) !important;
+    }
+
+    /* Slider components */
+    .gradio-container .gr-slider {
+        color: var(--text-color) !important;
+    }
+
+    /* Checkbox group items */
+    .gradio-container .gr-checkbox-group label {
+        color: var(--text-color) !important;
+    }
+
+    /* Force all text to be visible in dark mode */
+    .gradio-container *:not(button):not(input[type="button"]):not(input[type="submit"]) {
+        color: #e0e0e0 !important;
+    }
+
+    /* Specific override for very stubborn elements */
+    .gradio-container [data-testid] *,
+    .gradio-container .svelte-* {
+        color: #e0e0e0 !important;
+    }
+}
+
+/* Browser-specific dark mode detection */
+html[data-color-mode="dark"] .gradio-container *,
+html[data-theme="dark"] .gradio-container *,
+[data-bs-theme="dark"] .gradio-container *,
+.dark .gradio-container *,
+body.dark .gradio-container * {
+    color: #e0e0e0 !important;
+}
+
+/* High specificity override for any remaining dark text */
+.gradio-container *[style*="color"]:not([style*="color: rgb(224, 224, 224)"]):not([style*="color: #e0e0e0"]) {
+    color: var(--text-color) !important;
+}
+"""
+
+
+@functools.lru_cache(maxsize=None)
+def get_app_css() -> str:
+    """Full stylesheet for the app, built once per process.
+    
+    Kept lazy rather than a module constant because ui_components imports gradio.
+    """
+    from .ui_components import ProfessionalTheme
+    return ProfessionalTheme.get_css() + APP_CSS_OVERRIDES
+
+
+# Initialization error classes, tried in order (each alternative only looks ahead from the start)
+_INIT_ERROR_PATTERN = re.compile(
+    r"(?P<ollama>(?=.*ollama)(?=.*connection))"
+    r"|(?P<auth>(?=.*(?:api key|unauthorized)))"
+    r"|(?P<network>(?=.*(?:network|connection)))",
+    re.IGNORECASE | re.DOTALL
+)
+_INIT_ERROR_TIPS = {
+    "ollama": "💡 故障排除:\n1. 启动Ollama服务: ollama serve\n2. 检查端口占用: lsof -i :11434\n3. 验证Ollama状态: curl http://localhost:11434/api/tags",
+    "auth": "💡 故障排除:\n1. 检查API密钥是否正确配置\n2. 验证密钥是否有效且未过期\n3. 确认密钥权限设置",
+    "network": "💡 故障排除:\n1. 检查网络连接\n2. 验证防火墙设置\n3. 确认代理配置",
+}
+
+# Platform test failures by HTTP status, tried in order like _INIT_ERROR_PATTERN
+_TEST_ERROR_PATTERN = re.compile(
+    r"(?P<not_found>(?=.*404)(?=.*NotFound))"
+    r"|(?P<payment>(?=.*402))"
+    r"|(?P<auth>(?=.*401))"
+    r"|(?P<rate_limit>(?=.*429))",
+    re.DOTALL
+)
+_TEST_ERROR_MESSAGES = {
+    "not_found": "❌ {platform} 模型不存在或无访问权限",
+    "payment": "❌ {platform} 账户余额不足",
+    "auth": "❌ {platform} API密钥无效",
+    "rate_limit": "⚠️ {platform} 请求频率超限，请稍后重试",
+}
+
+
+@dataclass
+class AppState:
+    """Clients and derived UI data owned by one Gradio app, replaced by initialize_clients."""
+    manager: Optional["ConversationManager"] = None
+    platforms: Tuple[str, ...] = ()
+    # Platform choices, rebuilt only when the model info or platform list they came from changes
+    choices: Tuple[Tuple[str, str], ...] = ()
+    choices_source: Tuple[Any, Any] = (None, None)
+
+
+def initialize_clients(state: AppState, refresh_config: bool = False):
     """Initialize LLM clients with enhanced error reporting."""
-    global conversation_manager, available_platforms
+    from .client import LLMClientFactory
+    from .conversation import ConversationManager
     
     try:
-        config = get_config()
+        config = get_config(refresh=refresh_config)
         
         if config.count_enabled() == 0:
             logger.warning("No LLM platforms are enabled. Check your environment variables.")
@@ -47,56 +215,48 @@ def initialize_clients():
         if not clients:
             return "❌ 无法创建任何LLM客户端，请检查配置和网络连接"
         
-        conversation_manager = ConversationManager(clients)
-        available_platforms = [client.platform_name for client in clients]
-        
-        enabled_list = [client.platform_name for client in clients]
+        state.manager = ConversationManager(clients)
+        state.platforms = tuple(client.platform_name for client in clients)
         
         # Provide additional status information
         total_configured = config.count_enabled()
         success_count = len(clients)
         failed_count = total_configured - success_count
         
-        result_msg = f"✅ 成功初始化 {success_count} 个LLM平台: {', '.join(enabled_list)}"
+        result_msg = f"✅ 成功初始化 {success_count} 个LLM平台: {', '.join(state.platforms)}"
         
         if failed_count > 0:
             result_msg += f"\n⚠️ {failed_count} 个平台初始化失败"
             
-            # Add specific guidance for common issues
-            if any("ollama" in platform.lower() for platform in [c.platform_name for c in clients] if "ollama" in platform.lower()):
-                # Ollama succeeded
-                pass
-            else:
-                # Ollama might have failed
+            # Add specific guidance for common issues: Ollama might be the one that failed
+            has_ollama = any(platform.lower() == "ollama" for platform in state.platforms)
+            if not has_ollama:
                 result_msg += "\n💡 如果Ollama初始化失败，请确保服务正在运行: ollama serve"
         
         return result_msg
         
     except Exception as e:
         error_msg = str(e)
-        logger.error(f"Failed to initialize clients: {e}")
+        logger.error("Failed to initialize clients: %s", e)
         
         # Enhanced error messages with troubleshooting tips
-        if "ollama" in error_msg.lower() and "connection" in error_msg.lower():
-            return f"❌ 初始化失败: {error_msg}\n\n💡 故障排除:\n1. 启动Ollama服务: ollama serve\n2. 检查端口占用: lsof -i :11434\n3. 验证Ollama状态: curl http://localhost:11434/api/tags"
-        elif "api key" in error_msg.lower() or "unauthorized" in error_msg.lower():
-            return f"❌ 初始化失败: {error_msg}\n\n💡 故障排除:\n1. 检查API密钥是否正确配置\n2. 验证密钥是否有效且未过期\n3. 确认密钥权限设置"
-        elif "network" in error_msg.lower() or "connection" in error_msg.lower():
-            return f"❌ 初始化失败: {error_msg}\n\n💡 故障排除:\n1. 检查网络连接\n2. 验证防火墙设置\n3. 确认代理配置"
-        else:
-            return f"❌ 初始化失败: {error_msg}\n\n💡 建议: 请检查配置文件和环境变量设置"
+        match = _INIT_ERROR_PATTERN.match(error_msg)
+        tips = _INIT_ERROR_TIPS[match.lastgroup] if match else "💡 建议: 请检查配置文件和环境变量设置"
+        return f"❌ 初始化失败: {error_msg}\n\n{tips}"
 
 
-async def test_platform_config(platform_name: str) -> str:
-    """Test a specific platform configuration."""
-    if not conversation_manager:
+async def test_platform_config(state: AppState, platform_name: str, timeout: float = 10.0) -> str:
+    """Test a specific platform configuration, giving up after timeout seconds."""
+    from .client import Message
+    
+    if not state.manager:
         return "❌ 请先初始化LLM客户端"
     
-    if platform_name not in conversation_manager.clients:
+    if platform_name not in state.manager.clients:
         return f"❌ 平台 {platform_name} 未配置或未启用"
     
     try:
-        client = conversation_manager.clients[platform_name]
+        client = state.manager.clients[platform_name]
         
         # 创建简单的测试消息
         test_messages = [Message(
@@ -105,125 +265,163 @@ async def test_platform_config(platform_name: str) -> str:
             timestamp=time.time()
         )]
         
-        # 发送测试请求
-        response = await client.chat(test_messages)
+        # 发送测试请求：绕过响应缓存以真正访问平台，并测试配置的主模型
+        response = await asyncio.wait_for(
+            client.chat(test_messages, use_cache=False, model=client.config.model),
+            timeout=timeout
+        )
         
         if response.content:
             return f"✅ {platform_name} 配置正确，响应正常"
         else:
             return f"⚠️ {platform_name} 连接成功但响应为空"
             
+    except asyncio.TimeoutError:
+        return f"❌ {platform_name} 测试超时 ({timeout:g}s)"
     except Exception as e:
         error_str = str(e)
         
-        if "404" in error_str and "NotFound" in error_str:
-            if platform_name == "doubao":
-                return f"❌ 火山豆包配置错误：请检查 DOUBAO_MODEL 是否为正确的endpoint ID"
-            else:
-                return f"❌ {platform_name} 模型不存在或无访问权限"
-        elif "402" in error_str:
-            return f"❌ {platform_name} 账户余额不足"
-        elif "401" in error_str:
-            return f"❌ {platform_name} API密钥无效"
-        elif "429" in error_str:
-            return f"⚠️ {platform_name} 请求频率超限，请稍后重试"
-        else:
+        match = _TEST_ERROR_PATTERN.match(error_str)
+        if not match:
             return f"❌ {platform_name} 测试失败: {error_str[:100]}..."
+        if match.lastgroup == "not_found" and platform_name == "火山豆包":
+            return "❌ 火山豆包配置错误：请检查 DOUBAO_MODEL 是否为正确的endpoint ID"
+        return _TEST_ERROR_MESSAGES[match.lastgroup].format(platform=platform_name)
 
 
-def get_platform_model_info() -> Dict[str, str]:
-    """Get model information for each platform with caching."""
-    global _model_info_cache, _model_info_cache_timestamp
+async def test_all_platforms(state: AppState, platforms: Optional[List[str]] = None) -> Dict[str, str]:
+    """Test platforms concurrently (all initialized ones by default), keyed in the given order."""
+    if platforms is None:
+        platforms = list(state.platforms)
     
-    current_time = time.time()
+    results = await asyncio.gather(
+        *(test_platform_config(state, platform) for platform in platforms),
+        return_exceptions=True
+    )
     
-    # Check if we have valid cached data
-    if (_model_info_cache and 
-        current_time - _model_info_cache_timestamp < _model_info_cache_ttl):
-        return _model_info_cache
+    # One failing test must not hide the others' results
+    return {
+        platform: f"❌ {platform} 测试失败: {str(result)[:100]}" if isinstance(result, BaseException) else result
+        for platform, result in zip(platforms, results)
+    }
+
+
+def _fetch_model_info() -> Dict[str, str]:
+    """Fetch the display name with top model for each platform (network round-trips)."""
+    from .model_updater import ModelUpdater
     
-    try:
-        from .model_updater import ModelUpdater
-        
-        logger.info("Fetching latest model information...")
-        updater = ModelUpdater()
-        platforms_models = updater.get_all_platforms_models()
-        
-        model_info = {}
-        platform_name_mapping = {
-            'alibaba': '阿里云百炼',
-            'doubao': '火山豆包', 
-            'moonshot': '月之暗面',
-            'deepseek': 'DeepSeek',
-            'ollama': 'Ollama'
-        }
-        
-        for platform_key, platform_data in platforms_models.items():
-            platform_name = platform_name_mapping.get(platform_key, platform_data.platform)
-            
-            # Get top model for this platform
-            top_models = platform_data.get_top_models(1)
-            if top_models:
-                model = top_models[0]
-                # Format model info: Platform (Model Version)
-                model_info[platform_name] = f"{platform_name} ({model.name})"
-            else:
-                model_info[platform_name] = platform_name
-        
-        # Cache the results
-        _model_info_cache = model_info
-        _model_info_cache_timestamp = current_time
-        
-        logger.info(f"Model information cached for {len(model_info)} platforms")
-        return model_info
-        
-    except Exception as e:
-        logger.error(f"Failed to get model info: {e}")
-        # Return cached data if available, otherwise fallback to basic platform names
-        if _model_info_cache:
-            logger.info("Using cached model information due to error")
-            return _model_info_cache
+    logger.info("Fetching latest model information...")
+    updater = ModelUpdater()
+    platforms_models = updater.get_all_platforms_models()
+    
+    model_info = {}
+    for platform_key, platform_data in platforms_models.items():
+        platform_name = PLATFORM_DISPLAY_NAMES.get(platform_key, platform_data.platform)
+        
+        # Get top model for this platform
+        top_models = platform_data.get_top_models(1)
+        if top_models:
+            model = top_models[0]
+            # Format model info: Platform (Model Version)
+            model_info[platform_name] = f"{platform_name} ({model.name})"
         else:
-            logger.info("Using fallback platform names")
-            return {platform: platform for platform in available_platforms}
+            model_info[platform_name] = platform_name
+    
+    logger.info("Model information cached for %s platforms", len(model_info))
+    return model_info
 
 
-def refresh_model_info_cache():
-    """Manually refresh the model information cache."""
-    global _model_info_cache, _model_info_cache_timestamp
+class _ModelInfoCache:
+    """TTL cache for model info that serves stale data while refreshing in the background.
+    
+    Only a cold cache blocks the caller; concurrent callers share one in-flight refresh.
+    """
+    
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self.value: Dict[str, str] = {}
+        self.timestamp = 0.0
+        self.refresh_future: Optional[Future] = None
+        self.lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="model-info")
     
-    # Clear cache to force refresh
-    _model_info_cache = {}
-    _model_info_cache_timestamp = 0
+    def get(self) -> Dict[str, str]:
+        with self.lock:
+            value = self.value
+            if value and time.time() - self.timestamp < self.ttl:
+                return value
+            future = self.refresh_future
+            if future is None:
+                future = self.refresh_future = self._executor.submit(self._refresh)
+        
+        if value:
+            return value  # Stale, a refresh is already under way
+        return future.result()
+    
+    def invalidate(self):
+        with self.lock:
+            self.value = {}
+            self.timestamp = 0.0
+    
+    def _refresh(self) -> Dict[str, str]:
+        try:
+            model_info = _fetch_model_info()
+            with self.lock:
+                self.value = model_info
+                self.timestamp = time.time()
+            return model_info
+        except Exception as e:
+            logger.error("Failed to get model info: %s", e)
+            raise
+        finally:
+            with self.lock:
+                self.refresh_future = None
+
+
+_model_info_cache = _ModelInfoCache(ttl=300)  # 5 minutes cache
+
+
+def get_platform_model_info(platforms: Tuple[str, ...] = ()) -> Dict[str, str]:
+    """Get model information for each platform with caching.
+    
+    platforms is only used for the plain-name fallback when nothing could be fetched.
+    """
+    try:
+        return _model_info_cache.get()
+    except Exception:
+        # Nothing cached yet and the fetch failed
+        logger.info("Using fallback platform names")
+        return {platform: platform for platform in platforms}
+
+
+def refresh_model_info_cache(platforms: Tuple[str, ...] = ()):
+    """Manually refresh the model information cache, falling back to plain platform names."""
+    # Clear cache to force a blocking refresh
+    _model_info_cache.invalidate()
     
     # Get fresh model information
-    return get_platform_model_info()
+    return get_platform_model_info(platforms)
 
 
-def get_platform_choices():
+def get_platform_choices(state: AppState) -> Tuple[Tuple[str, str], ...]:
     """Get available platform choices for UI with model version info."""
-    model_info = get_platform_model_info()
+    model_info = get_platform_model_info(state.platforms)
     
-    # Filter to only include available platforms
-    choices = []
-    for platform in available_platforms:
-        display_name = model_info.get(platform, platform)
-        choices.append((display_name, platform))
+    # Both inputs are replaced, never mutated, when they change
+    source_model_info, source_platforms = state.choices_source
+    if model_info is not source_model_info or state.platforms is not source_platforms:
+        state.choices = tuple(
+            (model_info.get(platform, platform), platform) for platform in state.platforms
+        )
+        state.choices_source = (model_info, state.platforms)
     
-    return choices
+    return state.choices
 
 
-def get_summary_model_choices():
+def get_summary_model_choices(state: AppState) -> Tuple[Tuple[str, str], ...]:
     """Get available summary model choices with model version info."""
-    model_info = get_platform_model_info()
-    
-    # Create choices for summary models
-    choices = []
-    for platform in available_platforms:
-        display_name = model_info.get(platform, platform)
-        choices.append((display_name, platform))
-    
-    return choices
+    # Any initialized platform can summarize, so these are the platform choices
+    return get_platform_choices(state)
 
 
 def process_uploaded_files(files) -> Tuple[List[Dict[str, Any]], str]:
@@ -236,19 +434,27 @@ def process_uploaded_files(files) -> Tuple[List[Dict[str, Any]], str]:
     Returns:
         Tuple of (processed_files_list, status_message)
     """
-    if not files:
+    file_paths = [file_path for file_path in files or [] if file_path is not None]
+    if not file_paths:
         return [], ""
     
+    from .file_processor import get_file_processor, process_uploaded_file
+    
+    # Create the shared processor here so worker threads don't race to build it
+    get_file_processor()
+    
+    # Extraction is mostly PDF parsing and tesseract subprocesses, so threads overlap well
+    with ThreadPoolExecutor(max_workers=min(8, len(file_paths)), thread_name_prefix="file-processing") as executor:
+        futures = [executor.submit(process_uploaded_file, file_path) for file_path in file_paths]
+    
     processed_files = []
     status_messages = []
     
-    for file_path in files:
-        if file_path is None:
-            continue
-            
+    # Results are reported in upload order
+    for future in futures:
         try:
             # Process the file
-            result = process_uploaded_file(file_path)
+            result = future.result()
             processed_files.append(result)
             
             # Generate status message
@@ -269,391 +475,320 @@ def process_uploaded_files(files) -> Tuple[List[Dict[str, Any]], str]:
     return processed_files, status_text
 
 
-def create_conversation_with_files(topic: str, max_rounds: int, participants: List[str], 
-                                  round_timeout: float, processed_files: List[Dict[str, Any]]) -> str:
-    """Create a new conversation with file attachments."""
-    if not conversation_manager:
-        return "❌ 请先初始化LLM客户端"
+def create_conversation(manager: "ConversationManager", topic: str, max_rounds: int,
+                        participants: List[str], round_timeout: float, max_concurrent: int = 1,
+                        file_context: str = "", reuse_context: bool = False) -> Tuple[bool, str]:
+    """Create a new conversation, with file_context holding formatted attachment content.
     
+    Returns:
+        (True, conversation_id) on success, or (False, error message for display)
+    """
     if not topic.strip():
-        return "❌ 请输入讨论话题"
+        return False, "❌ 请输入讨论话题"
     
     if not participants:
-        return "❌ 请选择至少一个参与平台"
+        return False, "❌ 请选择至少一个参与平台"
+    
+    from .conversation import ConversationConfig
     
     try:
-        # Create enhanced topic with file context
-        enhanced_topic = topic.strip()
-        
-        # Add file content to topic if files are processed
-        if processed_files:
-            file_contexts = []
-            for file_data in processed_files:
-                if file_data['processing_status'] == 'success':
-                    file_context = format_file_content_for_context(file_data)
-                    file_contexts.append(file_context)
-            
-            if file_contexts:
-                enhanced_topic += "\n\n" + "\n\n".join(file_contexts)
-        
         config = ConversationConfig(
-            topic=enhanced_topic,
+            topic=topic.strip(),
             max_rounds=max_rounds,
-            round_timeout=round_timeout
+            round_timeout=round_timeout,
+            max_concurrent=int(max_concurrent),
+            file_context=file_context,
+            reuse_context=bool(reuse_context)
         )
         
-        conversation_id = conversation_manager.create_conversation(config, participants)
-        
-        file_summary = ""
-        if processed_files:
-            successful_files = [f for f in processed_files if f['processing_status'] == 'success']
-            if successful_files:
-                file_summary = f"，包含 {len(successful_files)} 个附件"
-        
-        return f"✅ 创建对话成功{file_summary}！对话ID: {conversation_id}"
+        conversation_id = manager.create_conversation(config, participants)
+        return True, conversation_id
         
     except Exception as e:
-        logger.error(f"Failed to create conversation with files: {e}")
-        return f"❌ 创建对话失败: {str(e)}"
+        logger.error("Failed to create conversation: %s", e)
+        return False, f"❌ 创建对话失败: {str(e)}"
 
 
-def create_conversation(topic: str, max_rounds: int, participants: List[str], round_timeout: float) -> str:
-    """Create a new conversation."""
-    if not conversation_manager:
-        return "❌ 请先初始化LLM客户端"
-    
-    if not topic.strip():
-        return "❌ 请输入讨论话题"
-    
-    if not participants:
-        return "❌ 请选择至少一个参与平台"
+async def prewarm_connections(state: AppState):
+    """Warm up connections to all initialized platforms in parallel."""
+    if not state.manager:
+        return
     
-    try:
-        config = ConversationConfig(
-            topic=topic.strip(),
-            max_rounds=max_rounds,
-            round_timeout=round_timeout
-        )
-        
-        conversation_id = conversation_manager.create_conversation(config, participants)
-        return f"✅ 创建对话成功！对话ID: {conversation_id}"
-        
-    except Exception as e:
-        logger.error(f"Failed to create conversation: {e}")
-        return f"❌ 创建对话失败: {str(e)}"
+    await asyncio.gather(*(client.prewarm() for client in state.manager.clients.values()))
 
 
-async def start_conversation_async(conversation_id: str, progress_callback=None):
+async def start_conversation_async(manager: "ConversationManager", conversation_id: str, progress_callback=None):
     """Start conversation asynchronously."""
-    if not conversation_manager:
-        return "❌ 对话管理器未初始化"
-    
     try:
-        conversation = await conversation_manager.start_conversation(conversation_id, progress_callback)
+        conversation = await manager.start_conversation(conversation_id, progress_callback)
         return conversation
     except Exception as e:
-        logger.error(f"Conversation failed: {e}")
+        logger.error("Conversation failed: %s", e)
         raise
 
 
-def format_conversation_display(conversation, streaming_content=None, progress_info=None) -> str:
-    """Format conversation for display with streaming support."""
-    if not conversation:
-        return "🔍 未找到对话记录"
+@dataclass(slots=True)
+class ProgressState:
+    """Live progress of a running conversation, updated from progress events."""
+    total_rounds: int
+    current_round: int = 0
+    current_platform: str = ""
+    status: str = "准备中..."
+    streaming_content: Dict[str, List[str]] = field(default_factory=dict)  # Streamed chunks per platform
+    active_streaming: bool = False  # Track if currently streaming
+    header_key: Optional[Tuple[str, int, int]] = None  # What the cached header was rendered from
+    header: str = ""
+
+
+def _format_fixed_header(conversation, status_text: str) -> str:
+    """Format the fixed header with participants and status."""
+    return (
+        '<div class="fixed-header">\n'
+        '<div class="fixed-header-content">\n'
+        f'<div class="discussion-participants">👥 参与者: {", ".join(conversation.participants)}</div>\n'
+        f'<div class="discussion-metadata">{status_text}</div>\n'
+        '</div>\n'  # End fixed-header-content
+        '</div>\n'  # End fixed-header
+    )
+
+
+def _render_streaming_section(out: io.StringIO, streaming_content: Dict[str, List[str]]):
+    """Write the live "正在回复中" section for the platforms currently streaming."""
+    out.write("### 💬 正在回复中...\n\n")
     
-    output = []
+    for platform, chunks in streaming_content.items():
+        content = "".join(chunks)
+        if content.strip():
+            emoji = _platform_emoji(platform, DEFAULT_PLATFORM_EMOJI)
+            out.write(f"#### {emoji} {platform}\n")
+            out.write(f'<div class="streaming-content">{content}</div>\n\n')
+            # 添加光标指示符表示正在输入
+            out.write('<span class="typing-cursor">▋</span> *正在输入中...*\n\n')
+
+
+def format_conversation_display(conversation, streaming_content=None, progress_info: Optional[ProgressState] = None,
+                                round_cache: Optional[Dict[int, str]] = None) -> str:
+    """Format conversation for display with streaming support.
     
-    # Fixed header with discussion topic, participants, and status
-    output.append('<div class="fixed-header">')
-    output.append('<div class="fixed-header-content">')
+    streaming_content maps platform names to the list of chunks streamed so far;
+    they are joined here, only when rendering. round_cache, if given, keeps the
+    rendered markup of completed rounds (by round number) across calls so that
+    repeated renders of one conversation only format the active round.
+    """
+    if not conversation:
+        return "🔍 未找到对话记录"
     
-    # Participants in fixed header
-    output.append(f'<div class="discussion-participants">👥 参与者: {", ".join(conversation.participants)}</div>')
+    out = io.StringIO()
     
     # Enhanced status with progress info
     if progress_info:
-        # Use dynamic progress information
-        status_text = f"📊 状态: {progress_info['status']} | 🔄 轮次: {progress_info['current_round']}/{progress_info['total_rounds']}"
+        # Use dynamic progress information; the header is rebuilt only when it changes
+        header_key = (progress_info.status, progress_info.current_round, progress_info.total_rounds)
+        if progress_info.header_key != header_key:
+            status_text = f"📊 状态: {header_key[0]} | 🔄 轮次: {header_key[1]}/{header_key[2]}"
+            progress_info.header = _format_fixed_header(conversation, status_text)
+            progress_info.header_key = header_key
+        out.write(progress_info.header)
     else:
         # Fallback to static status
         status_text = f"📊 状态: {conversation.state.value} | 🔄 轮次: {len(conversation.rounds)}/{conversation.config.max_rounds}"
-    
-    output.append(f'<div class="discussion-metadata">{status_text}</div>')
-    
-    output.append('</div>')  # End fixed-header-content
-    output.append('</div>')  # End fixed-header
+        out.write(_format_fixed_header(conversation, status_text))
     
     # Conversation content area
-    output.append('<div class="conversation-content">')
-    output.append("")
+    out.write('<div class="conversation-content">\n\n')
     
     if not conversation.rounds:
-        output.append("⏳ 等待对话开始...")
+        out.write("⏳ 等待对话开始...\n")
         # 但仍然需要检查是否有流式内容需要显示
         if streaming_content:
-            output.append("")
-            output.append("---")
-            output.append("")
+            out.write("\n---\n\n")
             # 显示第一轮的流式内容
-            output.append("## 🔄 第 1 轮")
-            output.append("⏳ 本轮对话进行中...")
-            output.append("")
-            output.append("### 💬 正在回复中...")
-            output.append("")
-            
-            # 平台图标映射
-            platform_emoji = {
-                "阿里云百炼": "🔵",
-                "火山豆包": "🔴", 
-                "月之暗面": "🌙",
-                "DeepSeek": "🤖",
-                "Ollama": "🏠"
-            }
-            
-            for platform, content in streaming_content.items():
-                if content and content.strip():
-                    emoji = platform_emoji.get(platform, "💬")
-                    output.append(f"#### {emoji} {platform}")
-                    output.append(f'<div class="streaming-content">{content}</div>')
-                    # 添加光标指示符表示正在输入
-                    output.append("")
-                    output.append('<span class="typing-cursor">▋</span> *正在输入中...*')
-                    output.append("")
-            
-            output.append("---")
-            output.append("")
+            out.write("## 🔄 第 1 轮\n")
+            out.write("⏳ 本轮对话进行中...\n\n")
+            _render_streaming_section(out, streaming_content)
+            out.write("---\n\n")
         else:
             # Close conversation-content container
-            output.append("</div>")  # End conversation-content
-            return "\n".join(output)
-    
-    # 平台图标映射
-    platform_emoji = {
-        "阿里云百炼": "🔵",
-        "火山豆包": "🔴", 
-        "月之暗面": "🌙",
-        "DeepSeek": "🤖",
-        "Ollama": "🏠"
-    }
+            out.write("</div>")  # End conversation-content
+            return out.getvalue()
     
     for round_obj in conversation.rounds:
-        output.append(f"## 🔄 第 {round_obj.round_number} 轮")
+        # Completed rounds never change, so their markup is reused from round_cache
+        is_completed = round_obj.end_time is not None
+        if is_completed and round_cache is not None and round_obj.round_number in round_cache:
+            out.write(round_cache[round_obj.round_number])
+            continue
+        
+        round_out = io.StringIO()
+        round_out.write(f"## 🔄 第 {round_obj.round_number} 轮\n")
         if round_obj.duration:
-            output.append(f"*⏱️ 耗时: {round_obj.duration:.1f}秒*")
-        output.append("")
+            round_out.write(f"*⏱️ 耗时: {round_obj.duration:.1f}秒*\n")
+        round_out.write("\n")
         
         if not round_obj.messages:
-            output.append("⏳ 本轮对话进行中...")
-            output.append("")
-            
-            # 如果这是最后一轮(正在进行的轮次)且有流式内容，显示在这里
-            if round_obj.round_number == len(conversation.rounds) and streaming_content:
-                output.append("### 💬 正在回复中...")
-                output.append("")
-                
-                for platform, content in streaming_content.items():
-                    if content and content.strip():
-                        emoji = platform_emoji.get(platform, "💬")
-                        output.append(f"#### {emoji} {platform}")
-                        output.append(f'<div class="streaming-content">{content}</div>')
-                        # 添加光标指示符表示正在输入
-                        output.append("")
-                        output.append('<span class="typing-cursor">▋</span> *正在输入中...*')
-                        output.append("")
+            round_out.write("⏳ 本轮对话进行中...\n\n")
         else:
             for msg in round_obj.messages:
                 if msg.role == "assistant":
-                    emoji = platform_emoji.get(msg.platform, "💬")
-                    output.append(f"### {emoji} {msg.platform}")
+                    emoji = _platform_emoji(msg.platform, DEFAULT_PLATFORM_EMOJI)
+                    round_out.write(f"### {emoji} {msg.platform}\n")
                     
-                    # 确保内容不为空
-                    content = msg.content if msg.content else "💭 [正在思考...]"
-                    output.append(content)
+                    # Content is never empty: ConversationManager stores a placeholder instead
+                    round_out.write(msg.content)
+                    round_out.write("\n")
                     
                     # 添加参考链接显示
                     if msg.has_references():
-                        output.append("")
-                        output.append("📚 参考链接:")
+                        round_out.write("\n📚 参考链接:\n")
                         for ref in msg.references or []:
                             title = ref.get('title', '未知标题')
                             url = ref.get('url', '#')
                             description = ref.get('description', '')
                             
                             if description:
-                                output.append(f"- 🔗 [{title}]({url}): {description}")
+                                round_out.write(f"- 🔗 [{title}]({url}): {description}\n")
                             else:
-                                output.append(f"- 🔗 [{title}]({url})")
+                                round_out.write(f"- 🔗 [{title}]({url})\n")
                     
-                    output.append("")
+                    round_out.write("\n")
+        
+        # 如果这是最后一轮(正在进行的轮次)且有流式内容，显示在这里
+        if not is_completed and round_obj.round_number == len(conversation.rounds) and streaming_content:
+            _render_streaming_section(round_out, streaming_content)
+        
+        round_out.write("---\n\n")
         
-        output.append("---")
-        output.append("")
+        round_markup = round_out.getvalue()
+        out.write(round_markup)
+        if is_completed and round_cache is not None:
+            round_cache[round_obj.round_number] = round_markup
     
     # Close conversation-content container
-    output.append("</div>")  # End conversation-content
+    out.write("</div>")  # End conversation-content
     
-    return "\n".join(output)
+    return out.getvalue()
 
 
-def run_conversation(topic: str, max_rounds: int, participants: List[str], 
-                    round_timeout: float):
+async def run_conversation(state: AppState, topic: str, max_rounds: int, participants: List[str], 
+                          round_timeout: float, max_concurrent: int = 1, file_context: str = "",
+                          reuse_context: bool = False):
     """Run a complete conversation workflow with streaming support."""
-    if not conversation_manager:
+    # Hold on to this manager: reinitialising (another tab, the init button) replaces
+    # state.manager, and this conversation must keep rendering from the one that runs it
+    manager = state.manager
+    if not manager:
         yield "❌ 请先初始化LLM客户端"
         return
     
     # Create conversation
-    create_result = create_conversation(topic, max_rounds, participants, round_timeout)
-    if create_result.startswith("❌"):
-        yield create_result
+    created, result = create_conversation(manager, topic, max_rounds, participants, round_timeout,
+                                          max_concurrent, file_context, reuse_context)
+    if not created:
+        yield result
         return
     
-    # Extract conversation ID
-    conversation_id = create_result.split("ID: ")[1]
+    conversation_id = result
+    conversation = manager.get_conversation(conversation_id)
     
     yield f"开始讨论话题: {topic}"
     
     # Progress tracking - 增强流式内容跟踪
-    progress_info = {
-        "current_round": 0,
-        "total_rounds": max_rounds,
-        "current_platform": "",
-        "status": "准备中...",
-        "streaming_content": {},  # Store streaming content for each platform
-        "active_streaming": False,  # Track if currently streaming
-        "last_update": time.time()
-    }
+    progress_info = ProgressState(total_rounds=max_rounds)
+    
+    # Set on every progress event; wakes the render loop instead of polling
+    progress_event = asyncio.Event()
+    # Set on state transitions (anything but streamed text); cuts the render throttle short
+    transition_event = asyncio.Event()
     
     def update_progress(event_type: str, data: Dict[str, Any]):
-        current_time = time.time()
+        progress_event.set()
+        if event_type != "participant_streaming":
+            transition_event.set()
         
         if event_type == "round_start":
-            progress_info["current_round"] = data["round"]
-            progress_info["status"] = f"第 {data['round']} 轮开始"
-            progress_info["streaming_content"] = {}
-            progress_info["active_streaming"] = False
-            # Force update to show the new round
-            progress_info["force_update"] = True
+            progress_info.current_round = data["round"]
+            progress_info.status = f"第 {data['round']} 轮开始"
+            progress_info.streaming_content = {}
+            progress_info.active_streaming = False
         elif event_type == "participant_thinking":
-            progress_info["current_platform"] = data["platform"]
+            progress_info.current_platform = data["platform"]
             if data.get("fallback_reason") == "streaming_failed":
-                progress_info["status"] = f"{data['platform']} 流式连接失败，尝试常规模式..."
+                progress_info.status = f"{data['platform']} 流式连接失败，尝试常规模式..."
             else:
-                progress_info["status"] = f"{data['platform']} 思考中..."
-            progress_info["streaming_content"][data["platform"]] = ""
-            progress_info["active_streaming"] = False
-            # Force update to show thinking status
-            progress_info["force_update"] = True
+                progress_info.status = f"{data['platform']} 思考中..."
+            progress_info.streaming_content[data["platform"]] = []
+            progress_info.active_streaming = False
         elif event_type == "participant_streaming":
             platform = data["platform"]
-            progress_info["current_platform"] = platform
-            progress_info["status"] = f"{platform} 回复中..."
-            progress_info["streaming_content"][platform] = data["partial_content"]
-            progress_info["active_streaming"] = True
-            progress_info["last_update"] = current_time
-            # Mark for immediate update
-            progress_info["force_update"] = True
+            progress_info.current_platform = platform
+            progress_info.status = f"{platform} 回复中..."
+            progress_info.streaming_content.setdefault(platform, []).append(data["delta"])
+            progress_info.active_streaming = True
         elif event_type == "participant_response":
             platform = data["platform"]
-            progress_info["status"] = f"{data['platform']} 回复完成"
+            progress_info.status = f"{data['platform']} 回复完成"
             # Keep the final content in streaming_content for a moment to allow final UI update
             # Clear the streaming content for this specific platform
-            if platform in progress_info["streaming_content"]:
-                del progress_info["streaming_content"][platform]
+            if platform in progress_info.streaming_content:
+                del progress_info.streaming_content[platform]
             # Only set active_streaming to False if no other platforms are streaming
-            if not progress_info["streaming_content"]:
-                progress_info["active_streaming"] = False
-            # Force update to show completion status
-            progress_info["force_update"] = True
+            if not progress_info.streaming_content:
+                progress_info.active_streaming = False
         elif event_type == "participant_timeout":
             platform = data["platform"]
             timeout_duration = data["timeout_duration"]
-            progress_info["current_platform"] = platform
-            progress_info["status"] = f"{platform} 响应超时 ({timeout_duration}s)"
+            progress_info.current_platform = platform
+            progress_info.status = f"{platform} 响应超时 ({timeout_duration}s)"
             # Clear the streaming content for this platform
-            if platform in progress_info["streaming_content"]:
-                del progress_info["streaming_content"][platform]
-            if not progress_info["streaming_content"]:
-                progress_info["active_streaming"] = False
-            # Force update to show timeout status
-            progress_info["force_update"] = True
+            if platform in progress_info.streaming_content:
+                del progress_info.streaming_content[platform]
+            if not progress_info.streaming_content:
+                progress_info.active_streaming = False
         elif event_type == "round_complete":
-            progress_info["status"] = f"第 {data['round']} 轮完成 (耗时: {data['duration']:.1f}s)"
-            progress_info["streaming_content"] = {}
-            progress_info["active_streaming"] = False
-            # Force update to show the completed round
-            progress_info["force_update"] = True
+            progress_info.status = f"第 {data['round']} 轮完成 (耗时: {data['duration']:.1f}s)"
+            progress_info.streaming_content = {}
+            progress_info.active_streaming = False
     
     # Start conversation
+    task = None
     try:
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        
-        async def run_with_progress():
-            conversation = await start_conversation_async(conversation_id, update_progress)
-            return conversation
-        
-        # Run conversation with periodic updates
-        task = loop.create_task(run_with_progress())
-        
-        # Track last update time for more responsive streaming
-        last_update_time = time.time()
-        last_streaming_content = {}
-        
-        while not task.done():
-            current_time = time.time()
-            
-            # Update progress display - compact format
-            # progress_text = f"{progress_info['current_round']}/{progress_info['total_rounds']} 轮 | {progress_info['status']}"
+        # Run the conversation on the server's event loop, next to this generator
+        task = asyncio.create_task(start_conversation_async(manager, conversation_id, update_progress))
+        
+        # Redraw whenever progress is reported; streamed text alone redraws at most once per 50ms
+        render_interval = 0.05
+        round_cache: Dict[int, str] = {}
+        last_display = None
+        
+        while True:
+            waiter = asyncio.ensure_future(progress_event.wait())
+            await asyncio.wait({task, waiter}, return_when=asyncio.FIRST_COMPLETED)
+            waiter.cancel()
             
-            # Get current conversation state
-            current_conv = conversation_manager.get_conversation(conversation_id)
+            if not progress_event.is_set():
+                break  # Conversation finished with nothing new to show
+            progress_event.clear()
+            transition_event.clear()
             
             # Format display with streaming content and progress info
-            streaming_content = progress_info["streaming_content"] if progress_info["active_streaming"] else None
-            conversation_display = format_conversation_display(current_conv, streaming_content, progress_info) if current_conv else ""
+            streaming_content = progress_info.streaming_content if progress_info.active_streaming else None
+            display = format_conversation_display(conversation, streaming_content, progress_info, round_cache)
             
-            # Force update if streaming content has changed or enough time has passed
-            should_update = False
+            # Events that leave the page unchanged (e.g. a repeated status) are not resent
+            if display != last_display:
+                last_display = display
+                yield display
             
-            if progress_info["active_streaming"]:
-                # Check if streaming content has changed
-                if streaming_content != last_streaming_content:
-                    should_update = True
-                    last_streaming_content = streaming_content.copy() if streaming_content else {}
-                # Or if enough time has passed (minimum 0.1s for streaming)
-                elif current_time - last_update_time >= 0.1:
-                    should_update = True
-            else:
-                # Non-streaming: update every 0.5s
-                if current_time - last_update_time >= 0.5:
-                    should_update = True
-            
-            # Always update if status changed significantly
-            if not hasattr(progress_info, '_last_status') or progress_info['status'] != progress_info.get('_last_status'):
-                should_update = True
-                progress_info['_last_status'] = progress_info['status']
-            
-            # Check for force update flag
-            if progress_info.get("force_update", False):
-                should_update = True
-                progress_info["force_update"] = False
-            
-            if should_update:
-                yield conversation_display
-                last_update_time = current_time
-            
-            # Dynamic sleep - very short for responsive UI
-            if progress_info["active_streaming"]:
-                # Very frequent updates during streaming
-                loop.run_until_complete(asyncio.sleep(0.01))
-            else:
-                # Still responsive when not streaming
-                loop.run_until_complete(asyncio.sleep(0.1))
+            # Let streamed chunks accumulate, unless a status change should show right away
+            if not transition_event.is_set():
+                try:
+                    await asyncio.wait_for(transition_event.wait(), render_interval)
+                except asyncio.TimeoutError:
+                    pass
         
         # Get final result
         final_conversation = task.result()
-        final_display = format_conversation_display(final_conversation)
+        final_display = format_conversation_display(final_conversation, round_cache=round_cache)
         
         yield final_display
         
@@ -662,145 +797,40 @@ def run_conversation(topic: str, max_rounds: int, participants: List[str],
         logger.error(error_msg)
         yield error_msg
     finally:
-        loop.close()
+        # Stop the conversation if the client went away mid-stream
+        if task and not task.done():
+            task.cancel()
 
 
-def export_conversation(conversation_id: str) -> str:
+def export_conversation(state: AppState, conversation_id: str) -> str:
     """Export conversation to JSON."""
-    if not conversation_manager or not conversation_id:
+    if not state.manager or not conversation_id:
         return "请提供有效的对话ID"
     
     try:
-        json_data = conversation_manager.export_conversation(conversation_id)
+        json_data = state.manager.export_conversation(conversation_id)
         return json_data
     except Exception as e:
         return f"导出失败: {str(e)}"
 
 
-def create_gradio_app() -> gr.Blocks:
+def create_gradio_app() -> "gr.Blocks":
     """Create the Gradio application."""
+    import gradio as gr
+    from .conversation import ConversationState
+    from .file_processor import format_file_content_for_context
+    from .summarizer import ConversationSummarizer, SummaryConfig
     
     # Import professional UI components
     from .ui_components import ProfessionalTheme, ProfessionalLayout, ConversationCard, StatusIndicator
     
     with gr.Blocks(
         title="🤖 LLM Chats - 多模型协作深度研究平台",
-        css=ProfessionalTheme.get_css() + """
-        /* Application-specific overrides */
-        .gradio-container {
-            max-width: 100% !important;
-            width: 100% !important;
-            margin: 0 auto !important;
-            padding: 20px !important;
-        }
-        
-        /* Main conversation display area - will use component styles */
-        
-        /* Typing cursor animation */
-        .typing-cursor {
-            animation: blink 1s infinite;
-            color: var(--primary-color);
-            font-weight: bold;
-        }
-        
-        @keyframes blink {
-            0% { opacity: 1; }
-            50% { opacity: 0; }
-            100% { opacity: 1; }
-        }
-        }
-        
-        /* Dark mode specific overrides */
-        @media (prefers-color-scheme: dark) {
-            .gradio-container {
-                background-color: #1a1a1a !important;
-            }
-            
-            /* Ensure buttons are visible in dark mode */
-            .gradio-container .gr-button {
-                color: var(--text-color) !important;
-            }
-            
-            /* Labels and form elements */
-            .gradio-container label {
-                color: var(--text-color) !important;
-            }
-            
-            /* Checkboxes and radio buttons */
-            .gradio-container .gr-checkbox,
-            .gradio-container .gr-radio {
-                color: var(--text-color) !important;
-            }
-            
-            /* Input fields and textareas */
-            .gradio-container input,
-            .gradio-container textarea,
-            .gradio-container select {
-                color: var(--text-color) !important;
-                background-color: #2a2a2a !important;
-                border-color: var(--border-color) !important;
-            }
-            
-            /* Placeholder text */
-            .gradio-container input::placeholder,
-            .gradio-container textarea::placeholder {
-                color: #888888 !important;
-            }
-            
-            /* Gradio specific elements */
-            .gradio-container .gr-form,
-            .gradio-container .gr-box,
-            .gradio-container .gr-panel {
-                background-color: #2a2a2a !important;
-            }
-            
-            /* Markdown and text content */
-            .gradio-container .gr-markdown {
-                color: var(--text-color) !important;
-            }
-            
-            /* Slider components */
-            .gradio-container .gr-slider {
-                color: var(--text-color) !important;
-            }
-            
-            /* Checkbox group items */
-            .gradio-container .gr-checkbox-group label {
-                color: var(--text-color) !important;
-            }
-            
-            /* Force all text to be visible in dark mode */
-            .gradio-container *:not(button):not(input[type="button"]):not(input[type="submit"]) {
-                color: #e0e0e0 !important;
-            }
-            
-            /* Specific override for very stubborn elements */
-            .gradio-container [data-testid] *,
-            .gradio-container .svelte-* {
-                color: #e0e0e0 !important;
-            }
-        }
-        
-        /* Browser-specific dark mode detection */
-        html[data-color-mode="dark"] .gradio-container *,
-        html[data-theme="dark"] .gradio-container *,
-        [data-bs-theme="dark"] .gradio-container *,
-        .dark .gradio-container *,
-        body.dark .gradio-container * {
-            color: #e0e0e0 !important;
-        }
-        
-        /* High specificity override for any remaining dark text */
-        .gradio-container *[style*="color"]:not([style*="color: rgb(224, 224, 224)"]):not([style*="color: #e0e0e0"]) {
-            color: var(--text-color) !important;
-        }
-        """
+        css=get_app_css()
     ) as app:
         
-        # Professional header
-        ProfessionalLayout.create_header()
-        
-        gr.Markdown("让不同的AI模型就同一话题进行深入讨论，探索通过多方对话理解话题的效果。")
+        # Professional header and intro rendered as one static component
+        ProfessionalLayout.create_header("让不同的AI模型就同一话题进行深入讨论，探索通过多方对话理解话题的效果。")
         
         with gr.Row():
             with gr.Column(scale=1, min_width=300):
@@ -840,6 +870,12 @@ def create_gradio_app() -> gr.Blocks:
                 
                 process_files_btn = gr.Button("处理文件", variant="secondary", visible=False)
                 
+                reuse_context = gr.Checkbox(
+                    label="附件仅首轮全文发送",
+                    value=False,
+                    info="第2轮起只附带与讨论相关的附件片段，长附件可明显缩短响应时间"
+                )
+                
                 with gr.Row():
                     max_rounds = gr.Slider(
                         label="最大轮次",
@@ -856,6 +892,15 @@ def create_gradio_app() -> gr.Blocks:
                         value=60,
                         step=10
                     )
+                    
+                    max_concurrent = gr.Slider(
+                        label="同时发言数",
+                        info="1 为依次发言；大于 1 时同一轮的平台并发回复，只参考之前轮次的内容",
+                        minimum=1,
+                        maximum=8,
+                        value=1,
+                        step=1
+                    )
                 
                 participants = gr.CheckboxGroup(
                     label="参与平台",
@@ -865,6 +910,7 @@ def create_gradio_app() -> gr.Blocks:
                 
                 with gr.Row():
                     test_btn = gr.Button("测试配置", variant="secondary")
+                    test_all_btn = gr.Button("测试全部", variant="secondary")
                     start_btn = gr.Button("开始讨论", variant="primary", size="lg")
                 
                 test_result = gr.Textbox(
@@ -915,6 +961,12 @@ def create_gradio_app() -> gr.Blocks:
                             info="是否在总结中包含对话统计信息"
                         )
                         
+                        use_draft = gr.Checkbox(
+                            label="草稿加速",
+                            value=False,
+                            info="先用轻量模型起草、再由所选模型修订（需配置对应平台的 *_SMALL_MODEL）"
+                        )
+                        
                         with gr.Row():
                             generate_summary_btn = gr.Button(
                                 "生成总结",
@@ -955,105 +1007,107 @@ def create_gradio_app() -> gr.Blocks:
                     elem_classes=["conversation-display"]
                 )
         
-        # Global state for processed files
-        processed_files_state = []
+        # Clients and platforms for this app, filled in by initialize_clients
+        app_state = AppState()
+        
+        # Formatted context of the uploaded files, built once per upload
+        file_context_state = ""
         
         # Global state for summary
         current_summary_result = None
         
         # Event handlers
-        def update_init_and_choices():
-            result = initialize_clients()
+        def init_and_fetch_choices(refresh_config: bool):
+            """Blocking part of (re)initialisation: config, client setup and model info."""
+            result = initialize_clients(app_state, refresh_config)
             
             # Pre-fetch model information for better UX
             if "✅ 成功初始化" in result:
                 try:
-                    get_platform_model_info()  # This will cache the model info
+                    get_platform_model_info(app_state.platforms)  # This will cache the model info
                 except Exception as e:
-                    logger.error(f"Failed to prefetch model info: {e}")
+                    logger.error("Failed to prefetch model info: %s", e)
             
-            choices = get_platform_choices()
-            # Also update summary model choices
-            summary_choices = get_summary_model_choices()
+            return result, get_platform_choices(app_state), get_summary_model_choices(app_state)
+        
+        async def update_init_and_choices(refresh_config: bool = False):
+            # Run off the event loop so in-flight conversations keep streaming meanwhile
+            result, choices, summary_choices = await asyncio.to_thread(init_and_fetch_choices, refresh_config)
+            return result, gr.update(choices=choices, value=[]), gr.update(choices=summary_choices, value=summary_choices[0][1] if summary_choices else None)
+        
+        # Serialises page loads so concurrent first visits initialise the clients once
+        load_lock = asyncio.Lock()
+        
+        async def load_init_and_choices():
+            """Initialise on the first page load; later loads and tabs reuse the running clients."""
+            async with load_lock:
+                if app_state.manager is None:
+                    return await update_init_and_choices()
+            # Model info may need a refresh, which blocks
+            choices = await asyncio.to_thread(get_platform_choices, app_state)
+            summary_choices = get_summary_model_choices(app_state)
+            result = f"✅ 成功初始化 {len(app_state.platforms)} 个LLM平台: {', '.join(app_state.platforms)}"
             return result, gr.update(choices=choices, value=[]), gr.update(choices=summary_choices, value=summary_choices[0][1] if summary_choices else None)
         
+        async def refresh_init_and_choices():
+            """Re-read platform configuration, then reinitialize clients."""
+            return await update_init_and_choices(refresh_config=True)
+        
         def handle_file_upload(files):
             """Handle file upload and processing."""
-            nonlocal processed_files_state
+            nonlocal file_context_state
             
             if not files:
-                processed_files_state = []
+                file_context_state = ""
                 return gr.update(visible=False), gr.update(visible=False)
             
-            # Process files
-            processed_files_state, status_text = process_uploaded_files(files)
+            # Process files and format their context now, so starting a discussion
+            # doesn't re-serialize the extracted text every time
+            processed_files, status_text = process_uploaded_files(files)
+            file_context_state = "\n\n".join(
+                format_file_content_for_context(processed_file)
+                for processed_file in processed_files
+            )
             
             if status_text:
                 return gr.update(value=status_text, visible=True), gr.update(visible=True)
             else:
                 return gr.update(visible=False), gr.update(visible=False)
         
-        def run_conversation_with_files(topic: str, max_rounds: int, participants: List[str], 
-                                round_timeout: float):
+        async def run_conversation_with_files(topic: str, max_rounds: int, participants: List[str], 
+                                              round_timeout: float, max_concurrent: int, reuse_file_context: bool):
             """Run conversation with file integration."""
-            nonlocal processed_files_state
-            
-            # If there are processed files, integrate them into the topic
-            if processed_files_state:
-                file_contexts = []
-                for processed_file in processed_files_state:
-                    file_context = format_file_content_for_context(processed_file)
-                    file_contexts.append(file_context)
-                
-                if file_contexts:
-                    enhanced_topic = f"{topic}\n\n" + "\n\n".join(file_contexts)
-                else:
-                    enhanced_topic = topic
-            else:
-                enhanced_topic = topic
-            
-            # Create conversation
-            if not conversation_manager:
-                yield "❌ 请先初始化LLM客户端"
-                return
-            
-            creation_result = create_conversation(enhanced_topic, max_rounds, participants, round_timeout)
-            
-            if not creation_result.startswith("✅"):
-                yield creation_result
-                return
-            
-            # Extract conversation ID
-            conversation_id = creation_result.split("ID: ")[1]
-            
-            if not conversation_id:
-                yield "❌ 无法获取对话ID"
-                return
-            
-            # Start the conversation
-            yield from run_conversation(enhanced_topic, max_rounds, participants, round_timeout)
-        
-        async def test_all_platforms(selected_platforms):
-            """Test all selected platform configurations."""
+            # Attachments travel as one fixed message after the system prompt rather
+            # than inside the topic, which is repeated in every turn's prompt
+            async for display in run_conversation(app_state, topic, max_rounds, participants, round_timeout,
+                                                  max_concurrent, file_context_state, reuse_file_context):
+                yield display
+        
+        async def test_selected_platforms(selected_platforms):
+            """Test the selected platform configurations."""
             if not selected_platforms:
                 return gr.update(value="请先选择要测试的平台", visible=True)
             
-            results = []
-            for platform in selected_platforms:
-                result = await test_platform_config(platform)
-                results.append(result)
+            results = await test_all_platforms(app_state, selected_platforms)
+            return gr.update(value="\n".join(results.values()), visible=True)
+        
+        async def test_every_platform():
+            """Test every initialized platform, regardless of the selection."""
+            if not app_state.platforms:
+                return gr.update(value="❌ 请先初始化LLM客户端", visible=True)
             
-            return gr.update(value="\n".join(results), visible=True)
+            results = await test_all_platforms(app_state)
+            return gr.update(value="\n".join(results.values()), visible=True)
         
-        async def generate_summary(model_name, style, format_type, include_statistics):
+        async def generate_summary(model_name, style, format_type, include_statistics, use_draft_model):
             """Generate conversation summary."""
             nonlocal current_summary_result
             
-            if not conversation_manager:
+            if not app_state.manager:
                 return "❌ 请先初始化LLM客户端", "", gr.update(interactive=False)
             
             # Get the most recent completed conversation
-            conversations = conversation_manager.list_conversations()
+            conversations = app_state.manager.list_conversations()
             completed_conversations = [c for c in conversations if c.state == ConversationState.COMPLETED]
             
             if not completed_conversations:
@@ -1067,9 +1121,7 @@ def create_gradio_app() -> gr.Blocks:
             
             try:
                 # Create summarizer
-                # conversation_manager is already checked above, so we can safely access it
-                assert conversation_manager is not None  # Type assertion for mypy
-                summarizer = ConversationSummarizer(conversation_manager.clients)
+                summarizer = ConversationSummarizer(app_state.manager.clients)
                 
                 # Create summary configuration - no length restrictions
                 config = SummaryConfig(
@@ -1077,7 +1129,8 @@ def create_gradio_app() -> gr.Blocks:
                     include_metadata=True,
                     include_statistics=include_statistics,
                     language="zh",
-                    article_style=style
+                    article_style=style,
+                    use_draft=use_draft_model
                 )
                 
                 # Generate summary
@@ -1087,7 +1140,7 @@ def create_gradio_app() -> gr.Blocks:
                 return f"✅ 总结生成成功！使用模型: {model_name}", summary_result.content, gr.update(interactive=True)
                 
             except Exception as e:
-                logger.error(f"Failed to generate summary: {e}")
+                logger.error("Failed to generate summary: %s", e)
                 return f"❌ 生成总结失败: {str(e)}", "", gr.update(interactive=False)
         
         def export_summary():
@@ -1097,9 +1150,9 @@ def create_gradio_app() -> gr.Blocks:
             
             try:
                 # Create summarizer to use export function
-                if not conversation_manager:
+                if not app_state.manager:
                     return "❌ 对话管理器未初始化"
-                summarizer = ConversationSummarizer(conversation_manager.clients)
+                summarizer = ConversationSummarizer(app_state.manager.clients)
                 result = summarizer.export_summary(current_summary_result)
                 return result
             except Exception as e:
@@ -1108,6 +1161,8 @@ def create_gradio_app() -> gr.Blocks:
         def update_models():
             """Update model configurations."""
             try:
+                from .model_updater import ModelUpdater
+                
                 updater = ModelUpdater()
                 # Get all platform models
                 platforms_models = updater.get_all_platforms_models()
@@ -1119,23 +1174,32 @@ def create_gradio_app() -> gr.Blocks:
                 report = updater.generate_models_report(platforms_models)
                 
                 # Refresh model info cache after update
-                refresh_model_info_cache()
+                refresh_model_info_cache(app_state.platforms)
                 
                 return result, gr.update(value=report, visible=True)
                 
             except Exception as e:
-                logger.error(f"Failed to update models: {e}")
+                logger.error("Failed to update models: %s", e)
                 return f"❌ 更新失败: {str(e)}", gr.update(visible=False)
         
         init_btn.click(
-            fn=update_init_and_choices,
+            fn=refresh_init_and_choices,
             outputs=[init_status, participants, summary_model]
+        ).then(
+            fn=functools.partial(prewarm_connections, app_state)
         )
         
         test_btn.click(
-            fn=test_all_platforms,
+            fn=test_selected_platforms,
             inputs=[participants],
-            outputs=[test_result]
+            outputs=[test_result],
+            concurrency_id="llm"
+        )
+        
+        test_all_btn.click(
+            fn=test_every_platform,
+            outputs=[test_result],
+            concurrency_id="llm"
         )
         
         # File upload event handlers
@@ -1147,15 +1211,17 @@ def create_gradio_app() -> gr.Blocks:
         
         start_btn.click(
             fn=run_conversation_with_files,
-            inputs=[topic_input, max_rounds, participants, round_timeout],
-            outputs=[conversation_display]
+            inputs=[topic_input, max_rounds, participants, round_timeout, max_concurrent, reuse_context],
+            outputs=[conversation_display],
+            concurrency_id="llm"
         )
         
         # Summary event handlers
         generate_summary_btn.click(
             fn=generate_summary,
-            inputs=[summary_model, summary_style, summary_format, include_stats],
-            outputs=[summary_status, summary_display, export_summary_btn]
+            inputs=[summary_model, summary_style, summary_format, include_stats, use_draft],
+            outputs=[summary_status, summary_display, export_summary_btn],
+            concurrency_id="llm"
         )
         
         export_summary_btn.click(
@@ -1170,71 +1236,67 @@ def create_gradio_app() -> gr.Blocks:
         
         # Initialize on startup
         app.load(
-            fn=update_init_and_choices,
+            fn=load_init_and_choices,
             outputs=[init_status, participants, summary_model]
+        ).then(
+            fn=functools.partial(prewarm_connections, app_state)
         )
         
-        # Add JavaScript for professional UI enhancements
+        # Add JavaScript for professional UI enhancements; dark mode is handled by the
+        # prefers-color-scheme block in APP_CSS_OVERRIDES, so nothing is injected at runtime
         app.load(
             None, 
             None, 
             None, 
-            js=ProfessionalTheme.get_js() + """
-            // Additional application-specific JavaScript
-            (function() {
-                setTimeout(function() {
-                    const isDarkMode = window.matchMedia && window.matchMedia('(prefers-color-scheme: dark)').matches;
-                    
-                    if (isDarkMode) {
-                        const style = document.createElement('style');
-                        style.id = 'dark-mode-override';
-                        style.textContent = '.gradio-container *, .gradio-container input, .gradio-container textarea, .gradio-container label { color: #e0e0e0 !important; } .gradio-container input::placeholder, .gradio-container textarea::placeholder { color: #888 !important; }';
-                        document.head.appendChild(style);
-                    }
-                }, 1000);
-            })();
-            """
+            js=ProfessionalTheme.get_js()
         )
     
+    # Handlers that call LLM providers share one pool of 8 slots (concurrency_id="llm");
+    # they are I/O bound async functions, so they overlap on the server event loop
+    app.queue(default_concurrency_limit=8, max_size=64)
+    
     return app
 
 
 def main():
     """Main entry point for the application."""
-    import os
+    import inspect
     import socket
+    import sys
     
     print("🚀 启动 LLM Chats 多方对话系统...")
     
-    # Disable all Gradio external connections
-    os.environ["GRADIO_ANALYTICS_ENABLED"] = "False"
-    os.environ["GRADIO_SERVER_NAME"] = "127.0.0.1"
-    os.environ["GRADIO_SHARE"] = "False"
-    
-    # Disable telemetry and external requests
-    for key in ["HF_HUB_DISABLE_TELEMETRY", "DISABLE_TELEMETRY", "DO_NOT_TRACK"]:
-        os.environ[key] = "1"
+    # Disable Gradio external connections and telemetry
+    apply_offline_env()
     
-    def check_port(port):
-        """Check if port is available."""
-        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-            return s.connect_ex(('127.0.0.1', port)) != 0
-    
-    # Find available port
-    port = 7860
-    while not check_port(port) and port < 7870:
-        port += 1
+    def find_free_port(host, start=7860, end=7870):
+        """Return the first port in [start, end) that can be bound on host, or None."""
+        for candidate in range(start, end):
+            with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+                # Match uvicorn's bind semantics so ports left in TIME_WAIT by a
+                # previous run are not reported as busy. Windows allows an SO_REUSEADDR
+                # bind on a port that is in active use, so ask for exclusive use there
+                if sys.platform == "win32":
+                    s.setsockopt(socket.SOL_SOCKET, socket.SO_EXCLUSIVEADDRUSE, 1)
+                else:
+                    s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+                try:
+                    s.bind((host, candidate))
+                except OSError:
+                    continue
+                return candidate
+        return None
     
-    if port >= 7870:
-        print("❌ 端口7860-7869都被占用，请释放端口后重试")
-        return
+    # Probe the port before building the app so that launch() runs once per strategy
+    port = find_free_port("127.0.0.1")
     
     app = create_gradio_app()
     
     # Launch strategies in order of preference
-    launch_strategies = [
-        # Strategy 1: Local with 127.0.0.1
-        {
+    launch_strategies = []
+    if port is not None:
+        # Strategy 1: Local with 127.0.0.1 on the probed port
+        launch_strategies.append({
             "server_name": "127.0.0.1",
             "server_port": port,
             "share": False,
@@ -1242,45 +1304,26 @@ def main():
             "show_error": False,
             "inbrowser": False,
             "enable_monitoring": False
-        },
-        # Strategy 2: Local with localhost
-        {
-            "server_name": "localhost", 
-            "server_port": port,
-            "share": False,
-            "quiet": True,
-            "show_error": False,
-            "inbrowser": False
-        },
-        # Strategy 3: Share link as fallback
-        {
-            "server_port": port,
-            "share": True,
-            "quiet": True,
-            "show_error": False,
-            "inbrowser": False
-        },
-        # Strategy 4: Minimal parameters
-        {
-            "share": True,
-            "quiet": True
-        }
-    ]
+        })
+    else:
+        print("⚠️ 端口7860-7869都被占用，将使用共享链接启动")
+    
+    # Strategy 2: Share link as fallback
+    launch_strategies.append({
+        "share": True,
+        "quiet": True,
+        "show_error": False,
+        "inbrowser": False
+    })
+    
+    # Drop options the installed Gradio version does not accept (e.g. enable_monitoring)
+    launch_params = set(inspect.signature(app.launch).parameters)
     
     for i, strategy in enumerate(launch_strategies, 1):
         try:
             print(f"🔄 尝试启动方式 {i}/{len(launch_strategies)}...")
             
-            # Filter out unsupported parameters
-            valid_params = {}
-            for key, value in strategy.items():
-                try:
-                    # Try to pass the parameter and see if it's accepted
-                    valid_params[key] = value
-                except:
-                    continue
-            
-            app.launch(**valid_params)
+            app.launch(**{key: value for key, value in strategy.items() if key in launch_params})
             
             # If we get here, launch was successful
             if strategy.get("share", False):
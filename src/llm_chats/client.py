@@ -1,18 +1,155 @@
 """LLM client implementations for different platforms."""
 import asyncio
-from abc import ABC, abstractmethod
-from typing import List, Dict, Any, Optional, AsyncGenerator, cast
-from dataclasses import dataclass
+import atexit
+import hashlib
+import json
+import random
+import re
+import time
+from abc import ABC
+from collections import OrderedDict
+from email.utils import parsedate_to_datetime
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional, AsyncGenerator, Awaitable, Callable, Tuple, cast
+from dataclasses import dataclass, field
 import logging
-import requests
 
-from openai import AsyncOpenAI
-from tenacity import retry, stop_after_attempt, wait_exponential
+import httpx
+from openai import AsyncOpenAI, APIError, APIStatusError, APIConnectionError
 
 from .config import LLMConfig
 
 logger = logging.getLogger(__name__)
 
+# One HTTP connection pool for every platform; httpx keeps connections per host,
+# so providers share the pool without sharing connections
+_HTTP_CLIENT: Optional[httpx.AsyncClient] = None
+
+# Shared OpenAI-compatible clients keyed by (api_key, base_url), so reinitialising
+# with an unchanged configuration reuses the existing clients
+_CLIENTS: Dict[tuple, AsyncOpenAI] = {}
+
+# LRU of chat() responses keyed by a digest of the endpoint, sampling settings
+# and messages; only touched from the event loop, so no lock is needed
+_RESPONSE_CACHE: "OrderedDict[str, ChatResponse]" = OrderedDict()
+_RESPONSE_CACHE_SIZE = 128
+
+# Model routing: a conversation turn goes to LLMConfig.small_model only after the
+# opening round, when the latest user turn is short and does not ask for heavy
+# reasoning. Only that turn is measured; the history grows every round anyway
+_SMALL_MODEL_MIN_ROUND = 2
+_SMALL_MODEL_MAX_PROMPT_CHARS = 2000
+_COMPLEX_PROMPT_PATTERN = re.compile(r"分析|证明|推导|推理|论证|比较|评估|总结|代码|analy[sz]e|prove|derive|reason")
+
+# Statuses worth retrying; anything else (401/402/403/404, bad requests) fails at once
+_RETRYABLE_STATUS_CODES = frozenset({408, 429, 500, 502, 503, 504})
+_MAX_RETRY_DELAY = 30.0
+
+
+def _http2_available() -> bool:
+    """HTTP/2 needs the optional h2 package (pip install 'httpx[http2]')."""
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Return the process-wide HTTP client, creating it on first use."""
+    global _HTTP_CLIENT
+    if _HTTP_CLIENT is None:
+        limits = httpx.Limits(
+            max_keepalive_connections=32,
+            max_connections=100,
+            keepalive_expiry=30.0
+        )
+        _HTTP_CLIENT = httpx.AsyncClient(limits=limits, http2=_http2_available())
+        atexit.register(_close_http_client)
+    return _HTTP_CLIENT
+
+
+def _close_http_client():
+    """Close pooled connections at interpreter exit."""
+    if _HTTP_CLIENT is None or _HTTP_CLIENT.is_closed:
+        return
+    try:
+        asyncio.run(_HTTP_CLIENT.aclose())
+    except Exception as e:
+        # The server loop that owned the connections may already be gone
+        logger.debug("Failed to close shared HTTP client: %s", e)
+
+
+def get_shared_client(api_key: str, base_url: str) -> AsyncOpenAI:
+    """Return the shared AsyncOpenAI client for an endpoint, creating it on first use."""
+    key = (api_key, base_url)
+    client = _CLIENTS.get(key)
+    if client is None:
+        client = AsyncOpenAI(
+            api_key=api_key,
+            base_url=base_url,
+            http_client=get_http_client()
+        )
+        _CLIENTS[key] = client
+    return client
+
+
+def _get_cached_response(key: Optional[str]) -> Optional['ChatResponse']:
+    """Look up a cached chat() response, marking it most recently used."""
+    if key is None:
+        return None
+    response = _RESPONSE_CACHE.get(key)
+    if response is not None:
+        _RESPONSE_CACHE.move_to_end(key)
+    return response
+
+
+def _cache_response(key: Optional[str], response: 'ChatResponse') -> None:
+    """Store a chat() response, evicting the least recently used entry when full."""
+    if key is None:
+        return
+    _RESPONSE_CACHE[key] = response
+    if len(_RESPONSE_CACHE) > _RESPONSE_CACHE_SIZE:
+        _RESPONSE_CACHE.popitem(last=False)
+
+
+def _parse_retry_after(headers: httpx.Headers) -> Optional[float]:
+    """Read the server's requested wait in seconds from Retry-After(-Ms) headers."""
+    value = headers.get("retry-after-ms")
+    if value:
+        try:
+            return float(value) / 1000
+        except ValueError:
+            pass
+    value = headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    try:
+        return parsedate_to_datetime(value).timestamp() - time.time()
+    except (TypeError, ValueError):
+        return None
+
+
+def _retry_delay(error: Exception, attempt: int, base_delay: float = 1.0) -> Optional[float]:
+    """Seconds to wait before retrying after error, or None when a retry cannot succeed.
+    
+    Honors Retry-After when the server sends one, otherwise backs off
+    exponentially with jitter so concurrent callers do not retry in lockstep.
+    """
+    if isinstance(error, APIStatusError):
+        if error.status_code not in _RETRYABLE_STATUS_CODES:
+            return None
+        retry_after = _parse_retry_after(error.response.headers)
+        if retry_after is not None:
+            return min(max(retry_after, 0.0), _MAX_RETRY_DELAY)
+    elif not isinstance(error, (APIConnectionError, httpx.TransportError, ConnectionError, TimeoutError)):
+        return None
+    return min(_MAX_RETRY_DELAY, base_delay * 2 ** attempt) * random.uniform(0.5, 1.5)
+
 
 def validate_and_clean_messages(messages: List['Message']) -> List['Message']:
     """
@@ -44,6 +181,11 @@ def validate_and_clean_messages(messages: List['Message']) -> List['Message']:
             else:
                 content = "[消息内容为空]"
         
+        # Reuse messages that are already clean, so their cached API dicts survive
+        if content == msg.content:
+            cleaned_messages.append(msg)
+            continue
+        
         # Create a new message with cleaned content
         cleaned_msg = Message(
             role=msg.role,
@@ -67,6 +209,15 @@ class Message:
     attachments: Optional[List[Dict[str, Any]]] = None
     # Reference links support
     references: Optional[List[Dict[str, str]]] = None
+    # API form of the message, built on first use; role and content are never reassigned
+    _openai_dict: Optional[Dict[str, str]] = field(default=None, init=False, repr=False, compare=False)
+    
+    @property
+    def openai(self) -> Dict[str, str]:
+        """The message as an OpenAI chat message dict, built once and reused."""
+        if self._openai_dict is None:
+            self._openai_dict = {"role": self.role, "content": self.content}
+        return self._openai_dict
     
     def has_attachments(self) -> bool:
         """Check if message has attachments."""
@@ -119,8 +270,6 @@ class Message:
     
     def extract_references_from_content(self) -> List[Dict[str, str]]:
         """Extract reference links from message content using regex."""
-        import re
-        
         references = []
         
         # Pattern to match markdown links: [title](url)
@@ -165,17 +314,62 @@ class BaseLLMClient(ABC):
     def __init__(self, config: LLMConfig):
         self.config = config
         self.platform_name = config.name
-        self.client = AsyncOpenAI(
-            api_key=config.api_key,
-            base_url=config.base_url
+        # Per-platform request bounds on a copy that still shares the endpoint's connection pool.
+        # SDK retries are off: chat() and stream_chat() retry config.max_retries times
+        # themselves, so there is a single retry layer and one Retry-After wait per failure
+        self.client = get_shared_client(config.api_key, config.base_url).with_options(
+            timeout=config.timeout,
+            max_retries=0
         )
     
-    @retry(
-        stop=stop_after_attempt(3),
-        wait=wait_exponential(multiplier=1, min=4, max=10)
-    )
-    async def chat(self, messages: List[Message]) -> ChatResponse:
-        """Send chat completion request."""
+    def _cache_key(self, model: str, openai_messages: List[Dict[str, str]],
+                   response_format: Optional[Dict[str, Any]] = None,
+                   max_tokens: Optional[int] = None) -> str:
+        """Digest everything that determines a completion for the response cache."""
+        payload = json.dumps(
+            [self.config.base_url, model, self.config.temperature,
+             max_tokens or self.config.max_tokens, response_format, openai_messages],
+            ensure_ascii=False
+        )
+        return hashlib.blake2b(payload.encode('utf-8'), digest_size=16).hexdigest()
+    
+    async def chat(self, messages: List[Message], use_cache: bool = True,
+                   model: Optional[str] = None,
+                   response_format: Optional[Dict[str, Any]] = None,
+                   round_num: Optional[int] = None,
+                   max_tokens: Optional[int] = None) -> ChatResponse:
+        """Send chat completion request, reusing the cached response for an identical request.
+        
+        Pass use_cache=False when the point of the call is to reach the platform
+        or to get a fresh sample (e.g. regenerating a summary),
+        model to use a model other than the configured one, and response_format
+        (e.g. {"type": "json_object"}) to request structured output. Conversation
+        turns pass round_num to opt into routing between model and small_model.
+        max_tokens overrides config.max_tokens for this call only.
+        """
+        return await self._with_retries(
+            lambda: self._chat_once(messages, use_cache, model, response_format, round_num, max_tokens)
+        )
+    
+    async def _with_retries(self, request: Callable[[], Awaitable[ChatResponse]]) -> ChatResponse:
+        """Await request(), retrying retryable failures up to config.max_retries times."""
+        attempt = 0
+        while True:
+            try:
+                return await request()
+            except Exception as e:
+                delay = _retry_delay(e, attempt) if attempt < self.config.max_retries else None
+                if delay is None:
+                    raise
+                attempt += 1
+                logger.warning("%s chat attempt %d failed: %s. Retrying in %.1fs...",
+                               self.platform_name, attempt, e, delay)
+                await asyncio.sleep(delay)
+    
+    async def _chat_once(self, messages: List[Message], use_cache: bool, model: Optional[str],
+                         response_format: Optional[Dict[str, Any]],
+                         round_num: Optional[int], max_tokens: Optional[int]) -> ChatResponse:
+        """Send one chat completion request, mapping failures to friendly messages."""
         try:
             # Validate and clean messages
             cleaned_messages = validate_and_clean_messages(messages)
@@ -185,16 +379,27 @@ class BaseLLMClient(ABC):
                 raise ValueError("No valid messages to send")
             
             # Convert messages to OpenAI format
-            openai_messages = [
-                {"role": msg.role, "content": msg.content}
-                for msg in cleaned_messages
-            ]
+            openai_messages = [msg.openai for msg in cleaned_messages]
+            
+            if not model:
+                model = (self.config.model if round_num is None
+                         else LLMClientFactory.route(self.config, cleaned_messages, round_num))
+            cache_key = None
+            if use_cache and self.config.enable_cache:
+                cache_key = self._cache_key(model, openai_messages, response_format, max_tokens)
+            cached = _get_cached_response(cache_key)
+            if cached is not None:
+                logger.debug("Response cache hit for %s", self.platform_name)
+                return cached
             
+            # Only send response_format when asked; not every compatible endpoint accepts it
+            extra_params: Dict[str, Any] = {"response_format": response_format} if response_format else {}
             response = await self.client.chat.completions.create(
-                model=self.config.model,
+                model=model,
                 messages=cast(Any, openai_messages),  # Type cast to handle OpenAI types
-                max_tokens=self.config.max_tokens,
-                temperature=self.config.temperature
+                max_tokens=max_tokens or self.config.max_tokens,
+                temperature=self.config.temperature,
+                **extra_params
             )
             
             # Ensure response content is not empty
@@ -202,13 +407,16 @@ class BaseLLMClient(ABC):
             if not response_content or response_content.strip() == "":
                 response_content = f"[{self.platform_name}响应内容为空]"
                 logger.warning(f"{self.platform_name} returned empty response, using placeholder")
+                cache_key = None  # Let the next identical request try again
             
-            return ChatResponse(
+            chat_response = ChatResponse(
                 content=response_content,
                 platform=self.platform_name,
-                model=self.config.model,
+                model=model,
                 usage=response.usage.model_dump() if response.usage else None
             )
+            _cache_response(cache_key, chat_response)
+            return chat_response
             
         except Exception as e:
             error_msg = str(e)
@@ -216,9 +424,9 @@ class BaseLLMClient(ABC):
             # 提供更友好的错误信息
             if "404" in error_msg and "NotFound" in error_msg:
                 if self.platform_name == "火山豆包":
-                    friendly_msg = f"火山豆包模型配置错误：模型'{self.config.model}'不存在。请检查是否使用了正确的endpoint ID。"
+                    friendly_msg = f"火山豆包模型配置错误：模型'{model or self.config.model}'不存在。请检查是否使用了正确的endpoint ID。"
                 else:
-                    friendly_msg = f"{self.platform_name}模型'{self.config.model}'不存在或无访问权限。"
+                    friendly_msg = f"{self.platform_name}模型'{model or self.config.model}'不存在或无访问权限。"
             elif "402" in error_msg and "Payment Required" in error_msg:
                 friendly_msg = f"{self.platform_name}账户余额不足，请充值后重试。"
             elif "401" in error_msg or "Unauthorized" in error_msg:
@@ -233,17 +441,20 @@ class BaseLLMClient(ABC):
             logger.error(f"Error in {self.platform_name} chat: {friendly_msg}")
             
             # 抛出带有友好信息的异常
-            from openai import APIError
             if isinstance(e, APIError):
                 e.message = friendly_msg
             raise
     
-    async def stream_chat(self, messages: List[Message]) -> AsyncGenerator[str, None]:
-        """Stream chat completion response with robust error handling."""
-        max_retries = 3
+    async def stream_chat(self, messages: List[Message],
+                          round_num: Optional[int] = None) -> AsyncGenerator[str, None]:
+        """Stream chat completion response with robust error handling.
+        
+        Conversation turns pass round_num to opt into routing between model and small_model.
+        """
+        max_attempts = self.config.max_retries + 1
         base_delay = 1.0
         
-        for attempt in range(max_retries):
+        for attempt in range(max_attempts):
             try:
                 # Validate and clean messages
                 cleaned_messages = validate_and_clean_messages(messages)
@@ -252,13 +463,12 @@ class BaseLLMClient(ABC):
                 if not cleaned_messages:
                     raise ValueError("No valid messages to send")
                 
-                openai_messages = [
-                    {"role": msg.role, "content": msg.content}
-                    for msg in cleaned_messages
-                ]
+                openai_messages = [msg.openai for msg in cleaned_messages]
+                model = (self.config.model if round_num is None
+                         else LLMClientFactory.route(self.config, cleaned_messages, round_num))
                 
                 stream = await self.client.chat.completions.create(
-                    model=self.config.model,
+                    model=model,
                     messages=cast(Any, openai_messages),  # Type cast to handle OpenAI types
                     max_tokens=self.config.max_tokens,
                     temperature=self.config.temperature,
@@ -273,39 +483,10 @@ class BaseLLMClient(ABC):
                 return
                         
             except Exception as e:
-                error_msg = str(e).lower()
-                
-                # Classify error types
-                is_connection_error = any(keyword in error_msg for keyword in [
-                    'connection', 'timeout', 'network', 'unreachable', 'refused', 'reset'
-                ])
-                
-                is_rate_limit = any(keyword in error_msg for keyword in [
-                    'rate limit', '429', 'too many requests'
-                ])
-                
-                is_auth_error = any(keyword in error_msg for keyword in [
-                    '401', '403', 'unauthorized', 'forbidden', 'invalid api key'
-                ])
-                
-                is_server_error = any(keyword in error_msg for keyword in [
-                    '500', '502', '503', '504', 'internal server error', 'bad gateway', 
-                    'service unavailable', 'gateway timeout'
-                ])
-                
-                # Determine if we should retry
-                should_retry = (
-                    attempt < max_retries - 1 and 
-                    (is_connection_error or is_rate_limit or is_server_error) and
-                    not is_auth_error  # Don't retry auth errors
-                )
-                
-                if should_retry:
-                    delay = base_delay * (2 ** attempt)  # Exponential backoff
-                    if is_rate_limit:
-                        delay = max(delay, 5.0)  # Longer delay for rate limits
-                    
-                    logger.warning(f"{self.platform_name} stream chat attempt {attempt + 1} failed: {e}. Retrying in {delay:.1f}s...")
+                delay = _retry_delay(e, attempt, base_delay) if attempt < max_attempts - 1 else None
+                if delay is not None:
+                    logger.warning("%s stream chat attempt %d failed: %s. Retrying in %.1fs...",
+                                   self.platform_name, attempt + 1, e, delay)
                     await asyncio.sleep(delay)
                     continue
                 else:
@@ -313,6 +494,14 @@ class BaseLLMClient(ABC):
                     self._log_stream_error(e, attempt + 1)
                     raise self._create_enhanced_exception(e)
     
+    async def prewarm(self) -> None:
+        """Open a pooled connection to the endpoint before the first chat request."""
+        try:
+            await self.client.with_options(timeout=2.0).models.list()
+        except Exception as e:
+            # Warm-up is best effort; the real request will surface any error
+            logger.debug("%s prewarm failed: %s", self.platform_name, e)
+    
     def _log_stream_error(self, error: Exception, attempts: int):
         """Log detailed stream error information."""
         error_msg = str(error)
@@ -403,38 +592,68 @@ class OllamaClient(BaseLLMClient):
         super().__init__(config)
         self._consecutive_failures = 0
         self._max_consecutive_failures = 3
-        
-        # Configure client for Ollama compatibility
-        self.client.timeout = 30.0  # Increase timeout for local models
     
-    async def chat(self, messages: List[Message]) -> ChatResponse:
-        """Override chat method to use Ollama native API for non-streaming."""
+    async def chat(self, messages: List[Message], use_cache: bool = True,
+                   model: Optional[str] = None,
+                   response_format: Optional[Dict[str, Any]] = None,
+                   round_num: Optional[int] = None,
+                   max_tokens: Optional[int] = None) -> ChatResponse:
+        """Override chat method to use Ollama native API for non-streaming.
+        
+        Ollama always uses the configured model and ignores model: switching
+        local models would force a model reload that costs far more than it saves.
+        A json_object response_format maps to the native "format": "json".
+        """
         try:
-            # Use Ollama native API
-            content = ""
-            async for chunk in self._stream_chat_native(messages):
-                content += chunk
-            
-            # Process content to extract actual response (filter out <think> tags)
-            processed_content = self._extract_actual_response(content)
-            
-            # Ensure response content is not empty
-            if not processed_content or processed_content.strip() == "":
-                processed_content = f"[{self.platform_name}响应内容为空]"
-                logger.warning(f"{self.platform_name} returned empty response, using placeholder")
-            
-            return ChatResponse(
-                content=processed_content,
-                platform=self.platform_name,
-                model=self.config.model,
-                usage=None  # Ollama doesn't provide usage info in native API
+            return await self._with_retries(
+                lambda: self._chat_native_once(messages, use_cache, response_format, max_tokens)
             )
-            
         except Exception as e:
             logger.error(f"Ollama chat error: {e}")
             # Re-raise with enhanced error message
             raise ConnectionError(f"Ollama chat failed: {str(e)}")
     
+    async def _chat_native_once(self, messages: List[Message], use_cache: bool,
+                                response_format: Optional[Dict[str, Any]],
+                                max_tokens: Optional[int]) -> ChatResponse:
+        """Send one non-streaming request through the native API, using the response cache."""
+        json_format = bool(response_format) and response_format.get("type") == "json_object"
+        cache_key = None
+        if use_cache and self.config.enable_cache:
+            cache_key = self._cache_key(
+                self.config.model,
+                [msg.openai for msg in messages],
+                response_format,
+                max_tokens
+            )
+        cached = _get_cached_response(cache_key)
+        if cached is not None:
+            logger.debug("Response cache hit for %s", self.platform_name)
+            return cached
+        
+        # Use Ollama native API
+        content = ""
+        async for chunk in self._stream_chat_native(messages, json_format, max_tokens):
+            content += chunk
+        
+        # Process content to extract actual response (filter out <think> tags)
+        processed_content = self._extract_actual_response(content)
+        
+        # Ensure response content is not empty
+        if not processed_content or processed_content.strip() == "":
+            processed_content = f"[{self.platform_name}响应内容为空]"
+            logger.warning(f"{self.platform_name} returned empty response, using placeholder")
+            cache_key = None  # Let the next identical request try again
+        
+        chat_response = ChatResponse(
+            content=processed_content,
+            platform=self.platform_name,
+            model=self.config.model,
+            usage=None  # Ollama doesn't provide usage info in native API
+        )
+        _cache_response(cache_key, chat_response)
+        return chat_response
+    
     def _extract_actual_response(self, content: str) -> str:
         """
         Extract the actual response from Ollama content, filtering out <think> tags.
@@ -445,8 +664,6 @@ class OllamaClient(BaseLLMClient):
         Returns:
             Cleaned content with actual response only
         """
-        import re
-        
         # Check if content contains <think> tags
         if '<think>' in content and '</think>' in content:
             # Remove all content between <think> and </think> tags
@@ -471,6 +688,8 @@ class OllamaClient(BaseLLMClient):
         # Extract the base URL without the /v1 suffix for health check
         health_url = base_url.replace('/v1', '') + '/api/tags'
         
+        import requests  # Only Ollama needs a synchronous health check
+        
         try:
             logger.info(f"Validating Ollama connection to: {health_url}")
             
@@ -506,8 +725,9 @@ class OllamaClient(BaseLLMClient):
         except Exception as e:
             raise ConnectionError(f"Failed to validate Ollama connection: {str(e)}")
     
-    async def stream_chat(self, messages: List[Message]) -> AsyncGenerator[str, None]:
-        """Override stream_chat with Ollama native API handling."""
+    async def stream_chat(self, messages: List[Message],
+                          round_num: Optional[int] = None) -> AsyncGenerator[str, None]:
+        """Override stream_chat with Ollama native API handling; always uses the configured model."""
         # Circuit breaker: if too many consecutive failures, raise immediately
         if self._consecutive_failures >= self._max_consecutive_failures:
             raise ConnectionError(f"Ollama service appears to be down (failed {self._consecutive_failures} times). Please check the service and restart.")
@@ -536,11 +756,9 @@ class OllamaClient(BaseLLMClient):
             else:
                 raise ConnectionError(f"Ollama错误: {str(e)}")
     
-    async def _stream_chat_native(self, messages: List[Message]) -> AsyncGenerator[str, None]:
+    async def _stream_chat_native(self, messages: List[Message], json_format: bool = False,
+                                  max_tokens: Optional[int] = None) -> AsyncGenerator[str, None]:
         """Use Ollama's native API for streaming with enhanced logging."""
-        import json
-        import aiohttp
-        
         # Convert messages to a single prompt for Ollama native API
         cleaned_messages = validate_and_clean_messages(messages)
         
@@ -570,158 +788,191 @@ class OllamaClient(BaseLLMClient):
             "stream": True,
             "options": {
                 "temperature": self.config.temperature,
-                "num_predict": self.config.max_tokens
+                "num_predict": max_tokens or self.config.max_tokens
             }
         }
+        if json_format:
+            # Constrain generation to valid JSON
+            payload["format"] = "json"
         
-        logger.info(f"Sending request to Ollama native API: {native_url}")
-        logger.info(f"Using model: {self.config.model}")
-        logger.debug(f"Payload: {json.dumps(payload, indent=2, ensure_ascii=False)}")
+        logger.info("Sending request to Ollama native API: %s", native_url)
+        logger.info("Using model: %s", self.config.model)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Payload: %s", json.dumps(payload, indent=2, ensure_ascii=False))
         
         response_chunks = []
         total_response_content = ""
         in_think_block = False
         
-        async with aiohttp.ClientSession() as session:
-            async with session.post(native_url, json=payload, timeout=aiohttp.ClientTimeout(total=60)) as response:
-                if response.status != 200:
-                    error_text = await response.text()
-                    logger.error(f"Ollama API returned status {response.status}: {error_text}")
-                    raise ConnectionError(f"Ollama API returned status {response.status}: {error_text}")
-                
-                logger.info("✅ Ollama API request successful, processing response stream...")
-                
-                async for line in response.content:
-                    if line:
-                        try:
-                            line_str = line.decode('utf-8').strip()
-                            if line_str:  # Skip empty lines
-                                data = json.loads(line_str)
-                                response_chunks.append(data)
-                                
-                                # Log the chunk data for debugging
-                                logger.debug(f"Received chunk: {data}")
-                                
-                                if 'response' in data:
-                                    chunk_content = data['response']
-                                    if chunk_content:  # Only process non-empty chunks
-                                        total_response_content += chunk_content
+        # Stream over the shared connection pool instead of a throwaway session per request
+        async with get_http_client().stream("POST", native_url, json=payload,
+                                            timeout=self.config.timeout) as response:
+            if response.status_code != 200:
+                error_text = (await response.aread()).decode('utf-8', errors='replace')
+                logger.error("Ollama API returned status %s: %s", response.status_code, error_text)
+                raise ConnectionError(f"Ollama API returned status {response.status_code}: {error_text}")
+            
+            logger.info("✅ Ollama API request successful, processing response stream...")
+            
+            async for line in response.aiter_lines():
+                if line:
+                    try:
+                        line_str = line.strip()
+                        if line_str:  # Skip empty lines
+                            data = json.loads(line_str)
+                            response_chunks.append(data)
+                            
+                            # Log the chunk data for debugging
+                            logger.debug("Received chunk: %s", data)
+                            
+                            if 'response' in data:
+                                chunk_content = data['response']
+                                if chunk_content:  # Only process non-empty chunks
+                                    total_response_content += chunk_content
+                                    
+                                    # Enhanced think block filtering with better logic
+                                    if '<think>' in chunk_content and '</think>' in chunk_content:
+                                        # Handle complete think blocks in a single chunk
+                                        parts = chunk_content.split('<think>')
+                                        before_think = parts[0]
+                                        remaining = '<think>'.join(parts[1:])
+                                        
+                                        # Yield content before think tag
+                                        if before_think:
+                                            logger.debug("Yielding content before think: '%s'", before_think)
+                                            yield before_think
                                         
-                                        # Enhanced think block filtering with better logic
-                                        if '<think>' in chunk_content and '</think>' in chunk_content:
-                                            # Handle complete think blocks in a single chunk
-                                            parts = chunk_content.split('<think>')
-                                            before_think = parts[0]
-                                            remaining = '<think>'.join(parts[1:])
-                                            
-                                            # Yield content before think tag
-                                            if before_think:
-                                                logger.debug(f"Yielding content before think: '{before_think}'")
-                                                yield before_think
-                                            
-                                            # Handle content after think tag
-                                            after_parts = remaining.split('</think>')
-                                            if len(after_parts) > 1:
-                                                after_think = '</think>'.join(after_parts[1:])
-                                                if after_think:
-                                                    logger.debug(f"Yielding content after think: '{after_think}'")
-                                                    yield after_think
-                                        elif '<think>' in chunk_content:
-                                            # Start of think block
-                                            before_think = chunk_content.split('<think>')[0]
-                                            if before_think and not in_think_block:
-                                                logger.debug(f"Yielding content before think: '{before_think}'")
-                                                yield before_think
-                                            in_think_block = True
-                                        elif '</think>' in chunk_content:
-                                            # End of think block
-                                            after_think = chunk_content.split('</think>')[-1]
-                                            in_think_block = False
+                                        # Handle content after think tag
+                                        after_parts = remaining.split('</think>')
+                                        if len(after_parts) > 1:
+                                            after_think = '</think>'.join(after_parts[1:])
                                             if after_think:
-                                                logger.debug(f"Yielding content after think: '{after_think}'")
+                                                logger.debug("Yielding content after think: '%s'", after_think)
                                                 yield after_think
-                                        elif not in_think_block:
-                                            # Normal content outside think blocks
-                                            logger.debug(f"Yielding normal chunk: '{chunk_content}'")
-                                            yield chunk_content
-                                        else:
-                                            # Inside think block - don't yield but log for debugging
-                                            logger.debug(f"Filtering think content: '{chunk_content}'")
-                                            pass
-                                    
-                                    elif data.get('done', False):
-                                        # This is the final chunk, might be empty
-                                        logger.debug("Received final chunk (done=True)")
-                                
-                                if data.get('done', False):
-                                    logger.info(f"✅ Ollama response complete. Total content length: {len(total_response_content)}")
-                                    if total_response_content:
-                                        logger.info(f"Response preview: {total_response_content[:200]}{'...' if len(total_response_content) > 200 else ''}")
+                                    elif '<think>' in chunk_content:
+                                        # Start of think block
+                                        before_think = chunk_content.split('<think>')[0]
+                                        if before_think and not in_think_block:
+                                            logger.debug("Yielding content before think: '%s'", before_think)
+                                            yield before_think
+                                        in_think_block = True
+                                    elif '</think>' in chunk_content:
+                                        # End of think block
+                                        after_think = chunk_content.split('</think>')[-1]
+                                        in_think_block = False
+                                        if after_think:
+                                            logger.debug("Yielding content after think: '%s'", after_think)
+                                            yield after_think
+                                    elif not in_think_block:
+                                        # Normal content outside think blocks
+                                        logger.debug("Yielding normal chunk: '%s'", chunk_content)
+                                        yield chunk_content
                                     else:
-                                        logger.warning("⚠️ Ollama response was empty!")
-                                    break
-                                    
-                        except json.JSONDecodeError as e:
-                            logger.warning(f"Failed to parse JSON from Ollama response: {e}, line: {line_str}")
-                            continue
+                                        # Inside think block - don't yield but log for debugging
+                                        logger.debug("Filtering think content: '%s'", chunk_content)
+                                        pass
+                                
+                                elif data.get('done', False):
+                                    # This is the final chunk, might be empty
+                                    logger.debug("Received final chunk (done=True)")
+                            
+                            if data.get('done', False):
+                                logger.info("✅ Ollama response complete. Total content length: %s", len(total_response_content))
+                                if total_response_content:
+                                    logger.info(f"Response preview: {total_response_content[:200]}{'...' if len(total_response_content) > 200 else ''}")
+                                else:
+                                    logger.warning("⚠️ Ollama response was empty!")
+                                break
+                                
+                    except json.JSONDecodeError as e:
+                        logger.warning("Failed to parse JSON from Ollama response: %s, line: %s", e, line_str)
+                        continue
+            
+            # Final check - if we got no content at all, log detailed info
+            if not total_response_content:
+                logger.error("❌ Ollama streaming completed but no content was received!")
+                logger.error("Total chunks received: %s", len(response_chunks))
+                if response_chunks:
+                    logger.error(f"Sample chunks: {json.dumps(response_chunks[:3], indent=2, ensure_ascii=False)}")
                 
-                # Final check - if we got no content at all, log detailed info
-                if not total_response_content:
-                    logger.error("❌ Ollama streaming completed but no content was received!")
-                    logger.error(f"Total chunks received: {len(response_chunks)}")
-                    if response_chunks:
-                        logger.error(f"Sample chunks: {json.dumps(response_chunks[:3], indent=2, ensure_ascii=False)}")
-                    
-                    # Yield a placeholder message to indicate the problem
-                    yield "[Ollama 响应为空 - 可能是模型配置问题或者模型正在加载中]"
+                # Yield a placeholder message to indicate the problem
+                yield "[Ollama 响应为空 - 可能是模型配置问题或者模型正在加载中]"
 
 
 class LLMClientFactory:
     """Factory for creating LLM clients."""
     
+    # Platform name aliases (matched against the lowercased config name) -> client class
+    CLIENT_REGISTRY = (
+        (("阿里云百炼", "alibaba"), AlibabaClient),
+        (("火山豆包", "doubao"), DoubaoClient),
+        (("月之暗面", "moonshot"), MoonshotClient),
+        (("deepseek",), DeepSeekClient),
+        (("ollama",), OllamaClient),
+    )
+    
+    @staticmethod
+    def route(config: LLMConfig, messages: List[Message], round_num: int) -> str:
+        """Pick the model for a conversation turn: small_model for short, simple turns, else model."""
+        if not config.small_model:
+            return config.model
+        # Opening statements set the direction of the discussion, keep them on the main model
+        if round_num < _SMALL_MODEL_MIN_ROUND:
+            return config.model
+        last_user = next((msg.content for msg in reversed(messages) if msg.role == "user"), "")
+        if len(last_user) > _SMALL_MODEL_MAX_PROMPT_CHARS:
+            return config.model
+        if _COMPLEX_PROMPT_PATTERN.search(last_user.lower()):
+            return config.model
+        return config.small_model
+    
     @staticmethod
     def create_client(config: LLMConfig) -> BaseLLMClient:
         """Create a client based on the config name."""
         platform_name = config.name.lower()
         
-        if "阿里云百炼" in config.name or "alibaba" in platform_name:
-            return AlibabaClient(config)
-        elif "火山豆包" in config.name or "doubao" in platform_name:
-            return DoubaoClient(config)
-        elif "月之暗面" in config.name or "moonshot" in platform_name:
-            return MoonshotClient(config)
-        elif "deepseek" in config.name or platform_name == "deepseek":
-            return DeepSeekClient(config)
-        elif "ollama" in config.name or platform_name == "ollama":
-            return OllamaClient(config)
-        else:
-            raise ValueError(f"Unsupported platform: {config.name}")
+        for aliases, client_class in LLMClientFactory.CLIENT_REGISTRY:
+            if any(alias in platform_name for alias in aliases):
+                return client_class(config)
+        
+        raise ValueError(f"Unsupported platform: {config.name}")
+    
+    @staticmethod
+    def _try_create_client(config: LLMConfig) -> Tuple[Optional[BaseLLMClient], Optional[str]]:
+        """Create one client, returning (client, None) or (None, error)."""
+        try:
+            logger.info(f"Creating client for {config.name}...")
+            client = LLMClientFactory.create_client(config)
+            logger.info(f"✅ Successfully created client for {config.name}")
+            return client, None
+        except ConnectionError as e:
+            # Special handling for connection errors (e.g., Ollama not running)
+            error_msg = f"❌ {config.name} connection failed: {str(e)}"
+            if "ollama" in config.name.lower():
+                error_msg += "\n💡 提示：请确保 Ollama 服务正在运行 (ollama serve)"
+            logger.warning(error_msg)
+            return None, str(e)
+        except Exception as e:
+            error_msg = f"❌ Failed to create client for {config.name}: {str(e)}"
+            logger.error(error_msg)
+            return None, str(e)
     
     @staticmethod
     def create_all_clients(platform_configs) -> List[BaseLLMClient]:
         """Create clients for all enabled platforms."""
-        from .config import PlatformConfigs
-        
         clients = []
         failed_clients = []
         
-        for config in platform_configs.get_enabled_configs():
-            try:
-                logger.info(f"Creating client for {config.name}...")
-                client = LLMClientFactory.create_client(config)
+        # Client creation may block on health checks (e.g. Ollama), so run platforms in parallel
+        configs = platform_configs.get_enabled_configs()
+        with ThreadPoolExecutor(max_workers=max(1, len(configs))) as pool:
+            results = list(pool.map(LLMClientFactory._try_create_client, configs))
+        
+        for config, (client, error) in zip(configs, results):
+            if client is not None:
                 clients.append(client)
-                logger.info(f"✅ Successfully created client for {config.name}")
-            except ConnectionError as e:
-                # Special handling for connection errors (e.g., Ollama not running)
-                error_msg = f"❌ {config.name} connection failed: {str(e)}"
-                if "ollama" in config.name.lower():
-                    error_msg += "\n💡 提示：请确保 Ollama 服务正在运行 (ollama serve)"
-                logger.warning(error_msg)
-                failed_clients.append((config.name, str(e)))
-            except Exception as e:
-                error_msg = f"❌ Failed to create client for {config.name}: {str(e)}"
-                logger.error(error_msg)
-                failed_clients.append((config.name, str(e)))
+            else:
+                failed_clients.append((config.name, error))
         
         if not clients:
             error_details = "\n".join([f"- {name}: {error}" for name, error in failed_clients])
@@ -730,4 +981,4 @@ class LLMClientFactory:
         if failed_clients:
             logger.info(f"✅ Successfully created {len(clients)} clients. {len(failed_clients)} clients failed to initialize.")
         
-        return clients 
\ No newline at end of file
+        return clients 
@@ -1,7 +1,6 @@
 """Configuration management for LLM platforms."""
 import os
-from typing import Dict, Any, Optional, List
-from pydantic import BaseModel, Field
+from typing import Dict, Optional, List
 from dotenv import load_dotenv
 from dataclasses import dataclass
 import logging
@@ -11,6 +10,31 @@ load_dotenv()
 
 logger = logging.getLogger(__name__)
 
+# Environment applied at startup to keep Gradio and HF libraries from phoning home
+OFFLINE_ENV = {
+    "GRADIO_ANALYTICS_ENABLED": "False",
+    "GRADIO_SERVER_NAME": "127.0.0.1",
+    "GRADIO_SHARE": "False",
+    "HF_HUB_DISABLE_TELEMETRY": "1",
+    "DISABLE_TELEMETRY": "1",
+    "DO_NOT_TRACK": "1",
+}
+
+
+def apply_offline_env() -> None:
+    """Apply OFFLINE_ENV in one batch, keeping values the user has already exported."""
+    os.environ.update({key: value for key, value in OFFLINE_ENV.items() if key not in os.environ})
+
+
+# Display names for platform keys, shared by the UI and model info lookups
+PLATFORM_DISPLAY_NAMES = {
+    'alibaba': '阿里云百炼',
+    'doubao': '火山豆包',
+    'moonshot': '月之暗面',
+    'deepseek': 'DeepSeek',
+    'ollama': 'Ollama'
+}
+
 
 @dataclass
 class LLMConfig:
@@ -20,6 +44,10 @@ class LLMConfig:
     base_url: str
     temperature: float = 0.7
     max_tokens: int = 3000  # 增加默认值以支持深度内容生成
+    timeout: float = 120.0  # Seconds per HTTP request, applied by the SDK client
+    max_retries: int = 2  # Retries after the first attempt for connection errors, 408, 429 and 5xx
+    enable_cache: bool = True  # Reuse chat() responses for identical requests
+    small_model: Optional[str] = None  # Faster model for short, simple turns; model stays the default
     
     def __post_init__(self):
         if not self.api_key:
@@ -49,7 +77,11 @@ class PlatformConfigs:
                     api_key=alibaba_key,
                     base_url=os.getenv('ALIBABA_BASE_URL', 'https://dashscope.aliyuncs.com/compatible-mode/v1'),
                     temperature=float(os.getenv('ALIBABA_TEMPERATURE', '0.7')),
-                    max_tokens=int(os.getenv('ALIBABA_MAX_TOKENS', '3000'))  # 增加到3000以支持深度内容
+                    max_tokens=int(os.getenv('ALIBABA_MAX_TOKENS', '3000')),  # 增加到3000以支持深度内容
+                    timeout=float(os.getenv('ALIBABA_TIMEOUT', '120')),
+                    max_retries=int(os.getenv('ALIBABA_MAX_RETRIES', '2')),
+                    enable_cache=os.getenv('ALIBABA_ENABLE_CACHE', 'true').lower() == 'true',
+                    small_model=os.getenv('ALIBABA_SMALL_MODEL') or None
                 )
             except ValueError as e:
                 logger.warning(f"阿里云百炼配置错误: {e}")
@@ -66,7 +98,11 @@ class PlatformConfigs:
                     api_key=doubao_key,
                     base_url=os.getenv('DOUBAO_BASE_URL', 'https://ark.cn-beijing.volces.com/api/v3'),
                     temperature=float(os.getenv('DOUBAO_TEMPERATURE', '0.7')),
-                    max_tokens=int(os.getenv('DOUBAO_MAX_TOKENS', '3000'))  # 增加到3000以支持深度内容
+                    max_tokens=int(os.getenv('DOUBAO_MAX_TOKENS', '3000')),  # 增加到3000以支持深度内容
+                    timeout=float(os.getenv('DOUBAO_TIMEOUT', '120')),
+                    max_retries=int(os.getenv('DOUBAO_MAX_RETRIES', '2')),
+                    enable_cache=os.getenv('DOUBAO_ENABLE_CACHE', 'true').lower() == 'true',
+                    small_model=os.getenv('DOUBAO_SMALL_MODEL') or None
                 )
             except ValueError as e:
                 logger.warning(f"火山豆包配置错误: {e}")
@@ -82,7 +118,11 @@ class PlatformConfigs:
                     api_key=moonshot_key,
                     base_url=os.getenv('MOONSHOT_BASE_URL', 'https://api.moonshot.cn/v1'),
                     temperature=float(os.getenv('MOONSHOT_TEMPERATURE', '0.7')),
-                    max_tokens=int(os.getenv('MOONSHOT_MAX_TOKENS', '3000'))  # 增加到3000以支持深度内容
+                    max_tokens=int(os.getenv('MOONSHOT_MAX_TOKENS', '3000')),  # 增加到3000以支持深度内容
+                    timeout=float(os.getenv('MOONSHOT_TIMEOUT', '120')),
+                    max_retries=int(os.getenv('MOONSHOT_MAX_RETRIES', '2')),
+                    enable_cache=os.getenv('MOONSHOT_ENABLE_CACHE', 'true').lower() == 'true',
+                    small_model=os.getenv('MOONSHOT_SMALL_MODEL') or None
                 )
             except ValueError as e:
                 logger.warning(f"月之暗面配置错误: {e}")
@@ -98,7 +138,11 @@ class PlatformConfigs:
                     api_key=deepseek_key,
                     base_url=os.getenv('DEEPSEEK_BASE_URL', 'https://api.deepseek.com/v1'),
                     temperature=float(os.getenv('DEEPSEEK_TEMPERATURE', '0.7')),
-                    max_tokens=int(os.getenv('DEEPSEEK_MAX_TOKENS', '3000'))  # 增加到3000以支持深度内容
+                    max_tokens=int(os.getenv('DEEPSEEK_MAX_TOKENS', '3000')),  # 增加到3000以支持深度内容
+                    timeout=float(os.getenv('DEEPSEEK_TIMEOUT', '120')),
+                    max_retries=int(os.getenv('DEEPSEEK_MAX_RETRIES', '2')),
+                    enable_cache=os.getenv('DEEPSEEK_ENABLE_CACHE', 'true').lower() == 'true',
+                    small_model=os.getenv('DEEPSEEK_SMALL_MODEL') or None
                 )
             except ValueError as e:
                 logger.warning(f"DeepSeek配置错误: {e}")
@@ -119,7 +163,10 @@ class PlatformConfigs:
                     api_key=os.getenv('OLLAMA_API_KEY', 'ollama'),  # Ollama doesn't require API key
                     base_url=base_url,
                     temperature=float(os.getenv('OLLAMA_TEMPERATURE', '0.7')),
-                    max_tokens=int(os.getenv('OLLAMA_MAX_TOKENS', '2000'))  # 增加到2000，本地模型稍微保守一些
+                    max_tokens=int(os.getenv('OLLAMA_MAX_TOKENS', '2000')),  # 增加到2000，本地模型稍微保守一些
+                    timeout=float(os.getenv('OLLAMA_TIMEOUT', '30')),
+                    max_retries=int(os.getenv('OLLAMA_MAX_RETRIES', '2')),
+                    enable_cache=os.getenv('OLLAMA_ENABLE_CACHE', 'true').lower() == 'true'
                 )
                 logger.info(f"Ollama配置: {base_url}, 模型: {ollama_config.model}")
             except ValueError as e:
@@ -191,9 +238,16 @@ class FileProcessingConfig:
         )
 
 
-def get_config() -> PlatformConfigs:
-    """Get platform configurations."""
-    return PlatformConfigs.from_env()
+# Cached platform configurations, rebuilt only on explicit refresh
+_config_cache: Optional[PlatformConfigs] = None
+
+
+def get_config(refresh: bool = False) -> PlatformConfigs:
+    """Get platform configurations, building them from the environment on first use."""
+    global _config_cache
+    if refresh or _config_cache is None:
+        _config_cache = PlatformConfigs.from_env()
+    return _config_cache
 
 
 def get_file_processing_config() -> FileProcessingConfig:
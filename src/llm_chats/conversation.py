@@ -1,16 +1,52 @@
 """Conversation management for multi-LLM discussions."""
 import asyncio
+import hashlib
+import re
+import statistics
 import time
-from typing import List, Dict, Optional, Callable, Any
+from typing import List, Dict, Optional, Callable, Any, Set
 from dataclasses import dataclass, field
 from enum import Enum
 import logging
-import json
 
-from .client import BaseLLMClient, Message, ChatResponse
+import orjson
+
+from .client import BaseLLMClient, Message
 
 logger = logging.getLogger(__name__)
 
+# Error classification for participant turns. Each pattern's named alternatives are
+# tried in order and only look ahead from the start, so one match gives the first hit.
+_CONNECTION_ERROR_PATTERN = re.compile(r"connection|timeout|network|unreachable|refused", re.IGNORECASE)
+_FALLBACK_ERROR_PATTERN = re.compile(
+    r"(?P<auth>(?=.*(?:401|unauthorized)))"
+    r"|(?P<rate_limit>(?=.*(?:429|rate limit)))"
+    r"|(?P<timeout>(?=.*timeout))"
+    r"|(?P<not_found>(?=.*404))",
+    re.IGNORECASE | re.DOTALL
+)
+_FALLBACK_ERROR_MESSAGES = {
+    "auth": "[{platform}认证失败: API密钥无效或已过期]",
+    "rate_limit": "[{platform}请求频率超限: 请稍后重试]",
+    "timeout": "[{platform}连接超时: 请检查网络连接]",
+    "not_found": "[{platform}模型不存在: 请检查模型配置]",
+}
+_TURN_ERROR_PATTERN = re.compile(
+    r"(?P<not_found>(?=.*404)(?=.*NotFound))"
+    r"|(?P<payment>(?=.*402)(?=.*Payment Required))"
+    r"|(?P<auth>(?=.*(?:401|Unauthorized)))"
+    r"|(?P<rate_limit>(?=.*429))"
+    r"|(?P<bad_request>(?=.*400)(?=.*empty))",
+    re.DOTALL
+)
+_TURN_ERROR_MESSAGES = {
+    "not_found": "[模型不存在或无权限访问]",
+    "payment": "[账户余额不足，请充值]",
+    "auth": "[API密钥无效]",
+    "rate_limit": "[请求频率超限，请稍后重试]",
+    "bad_request": "[消息格式错误，可能包含空内容]",
+}
+
 
 class ConversationState(Enum):
     """Conversation states."""
@@ -21,6 +57,40 @@ class ConversationState(Enum):
     ERROR = "error"
 
 
+# Keyword units for matching attachment excerpts: CJK text has no word breaks, so it
+# is compared by character bigrams, other scripts by whole words
+_KEYWORD_PATTERN = re.compile(r"[\u4e00-\u9fff]+|[A-Za-z0-9]{3,}")
+
+
+def _keywords(text: str) -> Set[str]:
+    """Split text into the keyword units used to score attachment excerpts."""
+    keywords: Set[str] = set()
+    for run in _KEYWORD_PATTERN.findall(text.lower()):
+        if run.isascii():
+            keywords.add(run)
+        else:
+            keywords.update(run[i:i + 2] for i in range(len(run) - 1))
+    return keywords
+
+
+def _select_relevant_excerpts(file_context: str, query: str, budget: int = 2000) -> str:
+    """Pick the attachment paragraphs sharing the most keywords with query, up to budget chars."""
+    paragraphs = [p.strip() for p in file_context.split("\n\n") if p.strip()]
+    query_keywords = _keywords(query)
+    scores = [len(query_keywords & _keywords(paragraph)) for paragraph in paragraphs]
+    ranked = sorted(range(len(paragraphs)), key=scores.__getitem__, reverse=True)
+    chosen, used = [], 0
+    for i in ranked:
+        if not scores[i]:
+            break
+        if used + len(paragraphs[i]) > budget:
+            continue
+        chosen.append(i)
+        used += len(paragraphs[i])
+    # Keep the excerpts in document order
+    return "\n\n".join(paragraphs[i] for i in sorted(chosen))
+
+
 @dataclass
 class ConversationConfig:
     """Configuration for a conversation."""
@@ -28,6 +98,9 @@ class ConversationConfig:
     max_rounds: int = 10
     max_participants: int = 8  # Increased to support all platforms + future expansion
     round_timeout: float = 60.0  # seconds
+    max_concurrent: int = 1  # Participants answering at once; 1 keeps turns sequential within a round
+    file_context: str = ""  # Formatted attachment content, appended to the system prompt
+    reuse_context: bool = False  # After round 1, send only the attachment excerpts relevant to the discussion
     system_prompt: str = field(default="")
     
     def __post_init__(self):
@@ -146,6 +219,8 @@ class Conversation:
     state: ConversationState = ConversationState.WAITING
     created_at: float = field(default_factory=time.time)
     updated_at: float = field(default_factory=time.time)
+    # Seconds each participant's turns took, timeouts and errors included
+    turn_latencies: Dict[str, List[float]] = field(default_factory=dict)
     
     def add_round(self, round_obj: ConversationRound):
         """Add a new round to the conversation."""
@@ -190,6 +265,33 @@ class Conversation:
         }
 
 
+class StreamBatcher:
+    """Coalesce streamed chunks so progress events fire per batch instead of per token."""
+    
+    def __init__(self, max_batch_chunks: int = 8, max_batch_ms: float = 50.0):
+        self.max_batch_chunks = max_batch_chunks
+        self.max_batch_seconds = max_batch_ms / 1000
+        self._pending: List[str] = []
+        self._batch_started = 0.0
+    
+    def add(self, chunk: str) -> Optional[str]:
+        """Buffer a chunk; return the batched delta once either threshold is reached."""
+        if not self._pending:
+            self._batch_started = time.monotonic()
+        self._pending.append(chunk)
+        
+        if (len(self._pending) >= self.max_batch_chunks or
+                time.monotonic() - self._batch_started >= self.max_batch_seconds):
+            return self.flush()
+        return None
+    
+    def flush(self) -> str:
+        """Return and clear whatever is still buffered."""
+        delta = "".join(self._pending)
+        self._pending.clear()
+        return delta
+
+
 class ConversationManager:
     """Manages multi-LLM conversations."""
     
@@ -229,7 +331,12 @@ class ConversationManager:
     
     async def start_conversation(self, conversation_id: str, 
                                progress_callback: Optional[Callable[[str, Dict[str, Any]], None]] = None) -> Conversation:
-        """Start a conversation."""
+        """Start a conversation.
+        
+        Within a round, participants answer in turn (each seeing earlier replies of the
+        round) unless config.max_concurrent > 1, in which case up to that many answer at
+        once from the same context and the round takes roughly as long as its slowest reply.
+        """
         conversation = self.conversations.get(conversation_id)
         if not conversation:
             raise ValueError(f"Conversation {conversation_id} not found")
@@ -238,20 +345,32 @@ class ConversationManager:
         self.active_conversation = conversation_id
         
         try:
-            # Add system message
-            system_message = Message(
-                role="system",
-                content=conversation.config.system_prompt,
-                timestamp=time.time()
-            )
-            
-            # Initial context for all participants
-            initial_context = [system_message]
+            # Initial context for all participants. It is built once and never mutated, so
+            # every request of the conversation starts with the same bytes and providers
+            # with automatic prefix caching can skip prefill for it. Attachments live in the
+            # system message: a separate user message would put two user turns in a row
+            # before the first prompt, which some models (deepseek-reasoner) reject
+            system_content = conversation.config.system_prompt
+            if conversation.config.file_context:
+                system_content += f"\n\n以下是本次讨论的参考附件：\n\n{conversation.config.file_context}"
+            initial_context = [Message(role="system", content=system_content, timestamp=time.time())]
+            full_context = initial_context
+            if logger.isEnabledFor(logging.DEBUG):
+                prefix = "\n".join(msg.content for msg in initial_context).encode('utf-8')
+                logger.debug("Conversation %s prefix digest: %s",
+                             conversation_id, hashlib.blake2b(prefix, digest_size=8).hexdigest())
             
             for round_num in range(1, conversation.config.max_rounds + 1):
                 if conversation.state != ConversationState.RUNNING:
                     break
                 
+                # Every participant has seen the full attachments in round 1; later rounds
+                # can carry just the excerpts that the last round's replies touch on
+                if round_num > 1 and conversation.config.reuse_context and conversation.config.file_context:
+                    initial_context = [self._build_excerpt_message(conversation)]
+                else:
+                    initial_context = full_context
+                
                 round_obj = ConversationRound(round_number=round_num, start_time=time.time())
                 
                 # 立即添加轮次对象到对话中，这样UI就能显示正在进行的轮次
@@ -264,199 +383,35 @@ class ConversationManager:
                     })
                 
                 # Each participant responds in this round
-                for platform in conversation.participants:
-                    if conversation.state != ConversationState.RUNNING:
-                        break
+                concurrency = min(conversation.config.max_concurrent, len(conversation.participants))
+                if concurrency > 1:
+                    # Concurrent turns all answer the same context (previous rounds only)
+                    round_context = self._build_turn_context(conversation, initial_context, round_num)
+                    semaphore = asyncio.Semaphore(concurrency)
                     
-                    try:
-                        # Get conversation context
-                        context = initial_context + conversation.get_all_messages()
-                        
-                        # Add a prompt for the current participant
-                        if len(conversation.participants) == 1:
-                            # Single participant - deep analysis mode
-                            if round_num == 1:
-                                user_prompt = f"请开始深入分析话题：{conversation.config.topic}。从你认为最重要的角度开始分析。"
-                            else:
-                                user_prompt = f"基于以上分析，请从新的角度继续深入思考话题'{conversation.config.topic}'。"
-                        else:
-                            # Multi-participant - discussion mode
-                            if round_num == 1:
-                                user_prompt = f"请开始讨论话题：{conversation.config.topic}。分享你的初步观点。"
-                            else:
-                                user_prompt = f"基于以上讨论，请继续就话题'{conversation.config.topic}'发表你的观点。"
-                        
-                        # Add reference links from previous rounds for validation
-                        if round_num > 1:
-                            previous_references = self._collect_previous_references(conversation, round_num - 1)
-                            if previous_references:
-                                reference_text = self._format_references_for_validation(previous_references)
-                                user_prompt += f"\n\n以下是其他参与者在之前轮次中提供的参考链接，请在你的回复中验证、引用或补充：\n{reference_text}"
-                        
-                        context.append(Message(
-                            role="user",
-                            content=user_prompt,
-                            timestamp=time.time()
-                        ))
-                        
-                        if progress_callback:
-                            progress_callback("participant_thinking", {
-                                "platform": platform,
-                                "round": round_num
-                            })
-                        
-                        # Get response from LLM with streaming
-                        client = self.clients[platform]
-                        
-                        # Initialize streaming response
-                        streaming_content = ""
-                        message_timestamp = time.time()
-                        
-                        try:
-                            stream_successful = False
-                            async for chunk in client.stream_chat(context):
-                                if conversation.state != ConversationState.RUNNING:
-                                    break
-                                    
-                                streaming_content += chunk
-                                stream_successful = True
-                                
-                                # Send streaming update to UI immediately
-                                if progress_callback:
-                                    progress_callback("participant_streaming", {
-                                        "platform": platform,
-                                        "round": round_num,
-                                        "partial_content": streaming_content,
-                                        "chunk": chunk
-                                    })
-                                
-                                # Minimal delay to prevent overwhelming the UI
-                                await asyncio.sleep(0.001)
-                                
-                        except Exception as e:
-                            error_msg = str(e)
-                            logger.error(f"Streaming error for {platform}: {e}")
-                            
-                            # Classify error type for better handling
-                            is_connection_error = any(keyword in error_msg.lower() for keyword in [
-                                'connection', 'timeout', 'network', 'unreachable', 'refused'
-                            ])
-                            
-                            is_ollama_error = "ollama" in platform.lower() and is_connection_error
-                            
-                            # Fall back to non-streaming if streaming fails
-                            try:
-                                if progress_callback:
-                                    progress_callback("participant_thinking", {
-                                        "platform": platform,
-                                        "round": round_num,
-                                        "fallback_reason": "streaming_failed"
-                                    })
-                                
-                                logger.info(f"Attempting fallback to non-streaming for {platform}...")
-                                response = await asyncio.wait_for(
-                                    client.chat(context),
-                                    timeout=conversation.config.round_timeout
+                    async def run_limited(platform: str):
+                        async with semaphore:
+                            if conversation.state == ConversationState.RUNNING:
+                                await self._run_participant_turn(
+                                    conversation, round_obj, platform, list(round_context), progress_callback
                                 )
-                                streaming_content = response.content
-                                logger.info(f"Fallback successful for {platform}")
-                                
-                            except Exception as fallback_e:
-                                fallback_error_msg = str(fallback_e)
-                                logger.error(f"Fallback error for {platform}: {fallback_e}")
-                                
-                                # Generate user-friendly error message based on error type
-                                if is_ollama_error:
-                                    streaming_content = f"[Ollama连接失败: 请确保Ollama服务正在运行 (ollama serve)]"
-                                elif "401" in fallback_error_msg or "unauthorized" in fallback_error_msg.lower():
-                                    streaming_content = f"[{platform}认证失败: API密钥无效或已过期]"
-                                elif "429" in fallback_error_msg or "rate limit" in fallback_error_msg.lower():
-                                    streaming_content = f"[{platform}请求频率超限: 请稍后重试]"
-                                elif "timeout" in fallback_error_msg.lower():
-                                    streaming_content = f"[{platform}连接超时: 请检查网络连接]"
-                                elif "404" in fallback_error_msg:
-                                    streaming_content = f"[{platform}模型不存在: 请检查模型配置]"
-                                else:
-                                    # Truncate very long error messages
-                                    error_preview = fallback_error_msg[:100] + "..." if len(fallback_error_msg) > 100 else fallback_error_msg
-                                    streaming_content = f"[{platform}服务错误: {error_preview}]"
-                        
-                        # Create final response message
-                        message = Message(
-                            role="assistant",
-                            content=streaming_content,
-                            platform=platform,
-                            timestamp=message_timestamp
-                        )
-                        
-                        # Extract references from the response
-                        references = message.extract_references_from_content()
-                        if references:
-                            message.references = references
-                            logger.info(f"Extracted {len(references)} references from {platform} response")
-                        
-                        round_obj.messages.append(message)
+                    
+                    await asyncio.gather(*(run_limited(platform) for platform in conversation.participants))
+                    
+                    # Replies land in completion order; store them in turn order
+                    turn_order = {platform: index for index, platform in enumerate(conversation.participants)}
+                    round_obj.messages.sort(key=lambda msg: turn_order.get(msg.platform, len(turn_order)))
+                else:
+                    for platform in conversation.participants:
+                        if conversation.state != ConversationState.RUNNING:
+                            break
                         
-                        if progress_callback:
-                            progress_callback("participant_response", {
-                                "platform": platform,
-                                "round": round_num,
-                                "message": message.content
-                            })
+                        # Sequential turns also see earlier replies from this round
+                        context = self._build_turn_context(conversation, initial_context, round_num)
+                        await self._run_participant_turn(conversation, round_obj, platform, context, progress_callback)
                         
                         # Small delay between participants
                         await asyncio.sleep(1)
-                        
-                    except asyncio.TimeoutError:
-                        timeout_duration = conversation.config.round_timeout
-                        logger.warning(f"Timeout for {platform} in round {round_num} after {timeout_duration}s")
-                        
-                        if progress_callback:
-                            progress_callback("participant_timeout", {
-                                "platform": platform,
-                                "round": round_num,
-                                "timeout_duration": timeout_duration
-                            })
-                        
-                        error_msg = Message(
-                            role="assistant",
-                            content=f"[响应超时: {platform}在{timeout_duration}秒内未响应，请检查网络连接或增加超时时间]",
-                            platform=platform,
-                            timestamp=time.time()
-                        )
-                        round_obj.messages.append(error_msg)
-                    except Exception as e:
-                        error_str = str(e)
-                        logger.error(f"Error for {platform} in round {round_num}: {e}")
-                        
-                        # 生成用户友好的错误消息，确保不为空
-                        if "404" in error_str and "NotFound" in error_str:
-                            if platform == "火山豆包":
-                                error_content = "[配置错误: 火山豆包endpoint ID无效，请检查DOUBAO_MODEL配置]"
-                            else:
-                                error_content = "[模型不存在或无权限访问]"
-                        elif "402" in error_str and "Payment Required" in error_str:
-                            error_content = "[账户余额不足，请充值]"
-                        elif "401" in error_str or "Unauthorized" in error_str:
-                            error_content = "[API密钥无效]"
-                        elif "429" in error_str:
-                            error_content = "[请求频率超限，请稍后重试]"
-                        elif "400" in error_str and "empty" in error_str:
-                            error_content = "[消息格式错误，可能包含空内容]"
-                        else:
-                            error_content = f"[错误: {error_str[:100]}...]" if len(error_str) > 100 else f"[错误: {error_str}]"
-                        
-                        # 确保错误内容不为空
-                        if not error_content or error_content.strip() == "":
-                            error_content = f"[{platform}发生未知错误]"
-                        
-                        error_msg = Message(
-                            role="assistant",
-                            content=error_content,
-                            platform=platform,
-                            timestamp=time.time()
-                        )
-                        round_obj.messages.append(error_msg)
                 
                 round_obj.end_time = time.time()
                 # 轮次对象已经在开始时添加到对话中了，这里只需要更新时间
@@ -480,9 +435,256 @@ class ConversationManager:
         finally:
             if self.active_conversation == conversation_id:
                 self.active_conversation = None
+            self._log_turn_latencies(conversation)
         
         return conversation
     
+    def _log_turn_latencies(self, conversation: Conversation):
+        """Log per-participant turn latency percentiles, to help tune round_timeout."""
+        for platform, latencies in conversation.turn_latencies.items():
+            ordered = sorted(latencies)
+            p90 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.9))]
+            logger.info(
+                "Turn latency for %s in %s: n=%d p50=%.2fs p90=%.2fs max=%.2fs (round_timeout=%ss)",
+                platform, conversation.id, len(ordered), statistics.median(ordered), p90, ordered[-1],
+                conversation.config.round_timeout
+            )
+    
+    def _build_excerpt_message(self, conversation: Conversation) -> Message:
+        """System message standing in for the attachments with the excerpts most relevant to the last round."""
+        query = " ".join(
+            [conversation.config.topic] + [msg.content for msg in conversation.rounds[-1].messages]
+        )
+        excerpts = _select_relevant_excerpts(conversation.config.file_context, query)
+        if excerpts:
+            content = f"（附件全文已在第1轮提供）以下是与当前讨论最相关的附件片段：\n\n{excerpts}"
+        else:
+            content = "（附件全文已在第1轮提供，本轮讨论未直接涉及其中的具体段落）"
+        # The system prompt stays first so the request prefix is unchanged
+        return Message(role="system", content=f"{conversation.config.system_prompt}\n\n{content}",
+                       timestamp=time.time())
+    
+    def _build_turn_context(self, conversation: Conversation, initial_context: List[Message],
+                            round_num: int) -> List[Message]:
+        """Build the messages sent to a participant for its turn in round_num."""
+        # Get conversation context
+        context = initial_context + conversation.get_all_messages()
+        
+        # Add a prompt for the current participant
+        if len(conversation.participants) == 1:
+            # Single participant - deep analysis mode
+            if round_num == 1:
+                user_prompt = f"请开始深入分析话题：{conversation.config.topic}。从你认为最重要的角度开始分析。"
+            else:
+                user_prompt = f"基于以上分析，请从新的角度继续深入思考话题'{conversation.config.topic}'。"
+        else:
+            # Multi-participant - discussion mode
+            if round_num == 1:
+                user_prompt = f"请开始讨论话题：{conversation.config.topic}。分享你的初步观点。"
+            else:
+                user_prompt = f"基于以上讨论，请继续就话题'{conversation.config.topic}'发表你的观点。"
+        
+        # Add reference links from previous rounds for validation
+        if round_num > 1:
+            previous_references = self._collect_previous_references(conversation, round_num - 1)
+            if previous_references:
+                reference_text = self._format_references_for_validation(previous_references)
+                user_prompt += f"\n\n以下是其他参与者在之前轮次中提供的参考链接，请在你的回复中验证、引用或补充：\n{reference_text}"
+        
+        context.append(Message(
+            role="user",
+            content=user_prompt,
+            timestamp=time.time()
+        ))
+        
+        return context
+    
+    async def _run_participant_turn(self, conversation: Conversation, round_obj: ConversationRound,
+                                    platform: str, context: List[Message],
+                                    progress_callback: Optional[Callable[[str, Dict[str, Any]], None]] = None):
+        """Get one participant's reply and append it (or an error placeholder) to round_obj."""
+        round_num = round_obj.round_number
+        started = time.perf_counter()
+        first_token_latency: Optional[float] = None
+        # Chunks received so far; kept outside the timeout so a cut-off reply is not lost
+        streaming_chunks: List[str] = []
+        
+        try:
+            if progress_callback:
+                progress_callback("participant_thinking", {
+                    "platform": platform,
+                    "round": round_num
+                })
+            
+            # Get response from LLM with streaming
+            client = self.clients[platform]
+            
+            # Initialize streaming response; chunks are joined once at the end
+            # so long replies stay linear instead of re-copying the whole text per chunk
+            streaming_content = ""
+            batcher = StreamBatcher()
+            message_timestamp = time.time()
+            
+            # One budget for the whole reply, streaming and fallback included
+            async with asyncio.timeout(conversation.config.round_timeout):
+                try:
+                    stream_successful = False
+                    async for chunk in client.stream_chat(context, round_num=round_num):
+                        if conversation.state != ConversationState.RUNNING:
+                            break
+                        
+                        if first_token_latency is None:
+                            first_token_latency = time.perf_counter() - started
+                        streaming_chunks.append(chunk)
+                        stream_successful = True
+                        
+                        # Send only new deltas to the UI, batched; it keeps its own buffer
+                        if progress_callback:
+                            delta = batcher.add(chunk)
+                            if delta:
+                                progress_callback("participant_streaming", {
+                                    "platform": platform,
+                                    "round": round_num,
+                                    "delta": delta
+                                })
+                                
+                                # Minimal delay to prevent overwhelming the UI
+                                await asyncio.sleep(0.001)
+                    
+                    # Deliver the tail of the last batch
+                    delta = batcher.flush()
+                    if progress_callback and delta:
+                        progress_callback("participant_streaming", {
+                            "platform": platform,
+                            "round": round_num,
+                            "delta": delta
+                        })
+                    
+                    streaming_content = "".join(streaming_chunks)
+                
+                except Exception as e:
+                    error_msg = str(e)
+                    logger.error(f"Streaming error for {platform}: {e}")
+                    
+                    # Classify error type for better handling
+                    is_ollama_error = "ollama" in platform.lower() and bool(_CONNECTION_ERROR_PATTERN.search(error_msg))
+                    
+                    # Fall back to non-streaming if streaming fails
+                    try:
+                        if progress_callback:
+                            progress_callback("participant_thinking", {
+                                "platform": platform,
+                                "round": round_num,
+                                "fallback_reason": "streaming_failed"
+                            })
+                        
+                        logger.info(f"Attempting fallback to non-streaming for {platform}...")
+                        response = await client.chat(context, round_num=round_num)
+                        streaming_content = response.content
+                        logger.info(f"Fallback successful for {platform}")
+                    
+                    except Exception as fallback_e:
+                        fallback_error_msg = str(fallback_e)
+                        logger.error(f"Fallback error for {platform}: {fallback_e}")
+                        
+                        # Generate user-friendly error message based on error type
+                        match = _FALLBACK_ERROR_PATTERN.match(fallback_error_msg)
+                        if is_ollama_error:
+                            streaming_content = f"[Ollama连接失败: 请确保Ollama服务正在运行 (ollama serve)]"
+                        elif match:
+                            streaming_content = _FALLBACK_ERROR_MESSAGES[match.lastgroup].format(platform=platform)
+                        else:
+                            # Truncate very long error messages
+                            error_preview = fallback_error_msg[:100] + "..." if len(fallback_error_msg) > 100 else fallback_error_msg
+                            streaming_content = f"[{platform}服务错误: {error_preview}]"
+            
+            # Never store an empty reply; same placeholder as the non-streaming chat path
+            if not streaming_content.strip():
+                streaming_content = f"[{platform}响应内容为空]"
+            
+            # Create final response message
+            message = Message(
+                role="assistant",
+                content=streaming_content,
+                platform=platform,
+                timestamp=message_timestamp
+            )
+            
+            # Extract references from the response
+            references = message.extract_references_from_content()
+            if references:
+                message.references = references
+                logger.info(f"Extracted {len(references)} references from {platform} response")
+            
+            round_obj.messages.append(message)
+            
+            if progress_callback:
+                progress_callback("participant_response", {
+                    "platform": platform,
+                    "round": round_num,
+                    "message": message.content
+                })
+            
+        except asyncio.TimeoutError:
+            timeout_duration = conversation.config.round_timeout
+            logger.warning(f"Timeout for {platform} in round {round_num} after {timeout_duration}s")
+            
+            if progress_callback:
+                progress_callback("participant_timeout", {
+                    "platform": platform,
+                    "round": round_num,
+                    "timeout_duration": timeout_duration
+                })
+            
+            if streaming_chunks:
+                # Keep what was already streamed (and shown live), marked as cut off
+                message = Message(
+                    role="assistant",
+                    content="".join(streaming_chunks) + f"\n\n[响应超时: {platform}在{timeout_duration}秒内未完成回复，以上内容不完整]",
+                    platform=platform,
+                    timestamp=time.time()
+                )
+                message.references = message.extract_references_from_content() or None
+            else:
+                message = Message(
+                    role="assistant",
+                    content=f"[响应超时: {platform}在{timeout_duration}秒内未响应，请检查网络连接或增加超时时间]",
+                    platform=platform,
+                    timestamp=time.time()
+                )
+            round_obj.messages.append(message)
+        except Exception as e:
+            error_str = str(e)
+            logger.error(f"Error for {platform} in round {round_num}: {e}")
+            
+            # 生成用户友好的错误消息，确保不为空
+            match = _TURN_ERROR_PATTERN.match(error_str)
+            if match and match.lastgroup == "not_found" and platform == "火山豆包":
+                error_content = "[配置错误: 火山豆包endpoint ID无效，请检查DOUBAO_MODEL配置]"
+            elif match:
+                error_content = _TURN_ERROR_MESSAGES[match.lastgroup]
+            else:
+                error_content = f"[错误: {error_str[:100]}...]" if len(error_str) > 100 else f"[错误: {error_str}]"
+            
+            # 确保错误内容不为空
+            if not error_content or error_content.strip() == "":
+                error_content = f"[{platform}发生未知错误]"
+            
+            error_msg = Message(
+                role="assistant",
+                content=error_content,
+                platform=platform,
+                timestamp=time.time()
+            )
+            round_obj.messages.append(error_msg)
+        finally:
+            elapsed = time.perf_counter() - started
+            conversation.turn_latencies.setdefault(platform, []).append(elapsed)
+            logger.info(
+                "%s turn in round %d took %.2fs (first token: %s)", platform, round_num, elapsed,
+                f"{first_token_latency:.2f}s" if first_token_latency is not None else "n/a"
+            )
+    
     def pause_conversation(self, conversation_id: str):
         """Pause an active conversation."""
         conversation = self.conversations.get(conversation_id)
@@ -511,7 +713,7 @@ class ConversationManager:
         if not conversation:
             raise ValueError(f"Conversation {conversation_id} not found")
         
-        return json.dumps(conversation.to_dict(), ensure_ascii=False, indent=2)
+        return orjson.dumps(conversation.to_dict(), option=orjson.OPT_INDENT_2).decode()
     
     def get_available_summarizers(self) -> List[str]:
         """Get list of available models for summarization."""
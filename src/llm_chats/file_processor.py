@@ -2,10 +2,7 @@
 import logging
 import os
 import tempfile
-import mimetypes
-from typing import Optional, Dict, Any, List, Union
-from pathlib import Path
-import base64
+from typing import Dict, Any
 import hashlib
 
 # File processing imports
@@ -1,11 +1,10 @@
 """Model updater for fetching latest models from different LLM platforms."""
 import requests
-import json
 import re
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, List, Optional
 from datetime import datetime
 import logging
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass
 from bs4 import BeautifulSoup
 import time
 
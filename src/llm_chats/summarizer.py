@@ -1,18 +1,32 @@
 """Conversation summarizer for generating deep research articles."""
-import asyncio
 import time
-from typing import List, Dict, Optional, Any
+from typing import List, Dict, Optional, Any, Union
 from dataclasses import dataclass
 from datetime import datetime
 import logging
-import json
 import re
 
-from .client import BaseLLMClient, Message, ChatResponse
-from .conversation import Conversation, ConversationRound
+import orjson
+
+from .client import BaseLLMClient, Message
+from .conversation import Conversation
 
 logger = logging.getLogger(__name__)
 
+# JSON summaries ask the model for these fields only, which bounds the output length
+_STRUCTURED_SUMMARY_SCHEMA = """{
+  "title": "文章标题",
+  "abstract": "200字以内的摘要",
+  "key_points": ["核心观点", "..."],
+  "consensus": ["各方共识", "..."],
+  "disagreements": ["主要分歧", "..."],
+  "recommendations": ["实践建议", "..."],
+  "references": [{"title": "参考资料标题", "url": "链接"}]
+}"""
+_STRUCTURED_SUMMARY_MAX_TOKENS = 2000
+# Some models wrap JSON in a markdown code fence even when asked not to
+_JSON_FENCE_PATTERN = re.compile(r"^```(?:json)?|```$", re.MULTILINE)
+
 
 @dataclass
 class SummaryConfig:
@@ -22,6 +36,7 @@ class SummaryConfig:
     include_statistics: bool = True
     language: str = "zh"  # zh, en
     article_style: str = "academic"  # academic, blog, report
+    use_draft: bool = False  # Draft with the platform's small_model, then revise with its main model
     
     def get_style_prompt(self) -> str:
         """Get style-specific prompt."""
@@ -174,6 +189,18 @@ class ConversationSummarizer:
             conversation, messages, config, statistics
         )
         
+        if config.output_format == "json":
+            structured = await self._generate_structured_summary(client, conversation, messages, statistics)
+            if structured is not None:
+                return SummaryResult(
+                    content=self._convert_to_json(structured, metadata, statistics),
+                    metadata=metadata,
+                    statistics=statistics,
+                    generated_at=datetime.now().isoformat(),
+                    generated_by=model_name,
+                    config=config
+                )
+        
         # Generate summary with enhanced max_tokens for comprehensive output
         try:
             # Create a temporary client configuration with higher max_tokens for summary generation
@@ -227,7 +254,22 @@ class ConversationSummarizer:
                 )
             ]
             
-            response = await client.chat(summary_messages)
+            draft_model = client.config.small_model if config.use_draft else None
+            if draft_model:
+                # The small model writes the article; the main model only revises it
+                draft = await client.chat(summary_messages, use_cache=False, model=draft_model)
+                summary_messages += [
+                    Message(role="assistant", content=draft.content, platform=model_name, timestamp=time.time()),
+                    Message(role="user", content=self._create_revision_prompt(), timestamp=time.time())
+                ]
+            
+            # Never from the response cache: asking again must produce a fresh summary
+            response = await client.chat(summary_messages, use_cache=False, model=client.config.model)
+            if draft_model:
+                logger.info(
+                    "Summary draft by %s used %s, revision by %s used %s",
+                    draft_model, draft.usage, client.config.model, response.usage
+                )
             
             # Restore original max_tokens
             client.config.max_tokens = original_max_tokens
@@ -307,6 +349,57 @@ class ConversationSummarizer:
         
         return base_prompt.strip()
     
+    async def _generate_structured_summary(self, client: BaseLLMClient, conversation: Conversation,
+                                           messages: List[Message],
+                                           statistics: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Ask for the summary as a JSON object; None if the platform can't provide one."""
+        prompt = f"""
+请基于以下多位AI专家的讨论，输出一个JSON对象作为结构化总结，不要输出JSON以外的任何内容。
+
+## 讨论主题
+{conversation.config.topic}
+
+## 参与专家
+{', '.join(conversation.participants)}（共{statistics.get('total_rounds', 0)}轮）
+
+## 专家讨论内容
+{self._format_conversation_content(messages)}
+
+## JSON结构
+{_STRUCTURED_SUMMARY_SCHEMA}
+""".strip()
+        summary_messages = [Message(role="user", content=prompt, timestamp=time.time())]
+        try:
+            # Structured fields need far fewer tokens than a full article; the budget is
+            # per call so conversations sharing this client keep their own max_tokens
+            response = await client.chat(
+                summary_messages,
+                use_cache=False,
+                model=client.config.model,
+                response_format={"type": "json_object"},
+                max_tokens=min(client.config.max_tokens, _STRUCTURED_SUMMARY_MAX_TOKENS)
+            )
+            structured = orjson.loads(_JSON_FENCE_PATTERN.sub("", response.content).strip())
+        except Exception as e:
+            logger.warning("Structured summary unavailable from %s, falling back to the full article: %s",
+                           client.platform_name, e)
+            return None
+        if not isinstance(structured, dict):
+            logger.warning("Structured summary from %s is not a JSON object, falling back to the full article",
+                           client.platform_name)
+            return None
+        return structured
+    
+    def _create_revision_prompt(self) -> str:
+        """Ask the main model to revise a draft summary instead of writing from scratch."""
+        return """
+以上是一份由轻量模型完成的文章初稿。请对照讨论内容审阅并修订：
+1. 纠正事实错误和与讨论内容不符的表述
+2. 补充遗漏的关键观点和参考资料
+3. 保留初稿中准确的内容与结构，不要无故重写
+4. 直接输出修订后的完整文章，不要附加修改说明
+""".strip()
+    
     def _format_conversation_content(self, messages: List[Message]) -> str:
         """Format conversation content for summary generation."""
         formatted_content = []
@@ -501,7 +594,7 @@ article_style: {config.article_style}
             
             return "\n".join(footer)
         else:
-            return f"统计信息: {json.dumps(statistics, ensure_ascii=False, indent=2)}"
+            return f"统计信息: {orjson.dumps(statistics, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS).decode()}"
     
     def _convert_to_html(self, content: str) -> str:
         """Convert markdown content to HTML."""
@@ -532,7 +625,7 @@ article_style: {config.article_style}
         
         return '\n\n'.join(html_paragraphs)
     
-    def _convert_to_json(self, content: str, metadata: Dict[str, Any], 
+    def _convert_to_json(self, content: Union[str, Dict[str, Any]], metadata: Dict[str, Any], 
                         statistics: Dict[str, Any]) -> str:
         """Convert content to JSON format."""
         json_data = {
@@ -542,7 +635,7 @@ article_style: {config.article_style}
             "generated_at": datetime.now().isoformat()
         }
         
-        return json.dumps(json_data, ensure_ascii=False, indent=2)
+        return orjson.dumps(json_data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS).decode()
     
     def export_summary(self, summary_result: SummaryResult, 
                       filename: Optional[str] = None) -> str:
@@ -564,8 +657,6 @@ article_style: {config.article_style}
     
     def _process_reference_links(self, content: str) -> str:
         """Process and validate reference links in the content."""
-        import re
-        
         # Find all markdown links in the content
         link_pattern = r'\[([^\]]+)\]\(([^)]+)\)'
         links = re.findall(link_pattern, content)
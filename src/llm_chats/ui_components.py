@@ -1,6 +1,5 @@
 """Professional UI components for LLM Chats application."""
 import gradio as gr
-from typing import Dict, Any, List, Tuple, Optional
 
 
 class ProfessionalTheme:
@@ -961,14 +960,16 @@ class ProfessionalLayout:
     """Professional layout components."""
     
     @staticmethod
-    def create_header() -> gr.Markdown:
-        """Create application header."""
-        return gr.Markdown(
-            """
+    def create_header(intro: str = "") -> gr.HTML:
+        """Create application header, with an optional intro line, as a single static block."""
+        intro_html = f'<p class="app-intro">{intro}</p>' if intro else ""
+        return gr.HTML(
+            f"""
             <div class="app-header">
                 <h1 class="app-title">🤖 LLM Chats</h1>
                 <p class="app-subtitle">多模型协作深度研究平台</p>
             </div>
+            {intro_html}
             """,
             elem_classes=["app-header"]
         )
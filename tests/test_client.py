@@ -0,0 +1,106 @@
+"""Tests for the pure helpers in llm_chats.client."""
+import time
+from email.utils import formatdate
+
+import httpx
+from openai import APIStatusError
+
+from llm_chats.client import _MAX_RETRY_DELAY, LLMClientFactory, Message, _parse_retry_after, _retry_delay
+from llm_chats.config import LLMConfig
+
+SYSTEM_PROMPT = "你是一个资深专家。" * 500
+
+
+def make_config(small_model="small"):
+    return LLMConfig(name="DeepSeek", model="main", api_key="key",
+                     base_url="https://example.com/v1", small_model=small_model)
+
+
+def make_messages(prompt):
+    return [
+        Message(role="system", content=SYSTEM_PROMPT),
+        Message(role="assistant", content="第1轮的长篇回复。" * 500, platform="DeepSeek"),
+        Message(role="user", content=prompt),
+    ]
+
+
+def test_route_uses_small_model_for_short_follow_up():
+    messages = make_messages("请继续发表你的观点。")
+    assert LLMClientFactory.route(make_config(), messages, 2) == "small"
+
+
+def test_route_ignores_history_length():
+    # Only the latest user turn counts; round 2 history is always long
+    messages = make_messages("好的，继续。")
+    assert sum(len(msg.content) for msg in messages) > 2000
+    assert LLMClientFactory.route(make_config(), messages, 3) == "small"
+
+
+def test_route_keeps_main_model_without_small_model():
+    messages = make_messages("请继续发表你的观点。")
+    assert LLMClientFactory.route(make_config(small_model=None), messages, 2) == "main"
+
+
+def test_route_keeps_opening_round_on_main_model():
+    messages = make_messages("请开始讨论。")
+    assert LLMClientFactory.route(make_config(), messages, 1) == "main"
+
+
+def test_route_keeps_long_prompt_on_main_model():
+    messages = make_messages("请继续。" + "参考链接" * 600)
+    assert LLMClientFactory.route(make_config(), messages, 2) == "main"
+
+
+def test_route_keeps_complex_prompt_on_main_model():
+    assert LLMClientFactory.route(make_config(), make_messages("请深入分析这个方案。"), 2) == "main"
+    assert LLMClientFactory.route(make_config(), make_messages("Please ANALYZE it."), 2) == "main"
+
+
+def make_status_error(status_code, headers=None):
+    request = httpx.Request("POST", "https://example.com/v1/chat/completions")
+    response = httpx.Response(status_code, headers=headers, request=request)
+    return APIStatusError("error", response=response, body=None)
+
+
+def test_parse_retry_after_prefers_milliseconds():
+    headers = httpx.Headers({"retry-after-ms": "1500", "retry-after": "9"})
+    assert _parse_retry_after(headers) == 1.5
+
+
+def test_parse_retry_after_reads_seconds():
+    assert _parse_retry_after(httpx.Headers({"retry-after": "3"})) == 3.0
+
+
+def test_parse_retry_after_reads_http_date():
+    value = formatdate(time.time() + 60, usegmt=True)
+    assert 55 < _parse_retry_after(httpx.Headers({"retry-after": value})) <= 60
+
+
+def test_parse_retry_after_ignores_missing_or_invalid_values():
+    assert _parse_retry_after(httpx.Headers()) is None
+    assert _parse_retry_after(httpx.Headers({"retry-after": "soon"})) is None
+
+
+def test_retry_delay_honors_retry_after():
+    assert _retry_delay(make_status_error(429, {"retry-after": "4"}), attempt=0) == 4.0
+
+
+def test_retry_delay_caps_retry_after():
+    assert _retry_delay(make_status_error(503, {"retry-after": "3600"}), attempt=0) == _MAX_RETRY_DELAY
+
+
+def test_retry_delay_backs_off_exponentially_with_jitter():
+    for attempt in range(3):
+        delay = _retry_delay(make_status_error(500), attempt=attempt)
+        assert 0.5 * 2 ** attempt <= delay <= 1.5 * 2 ** attempt
+
+
+def test_retry_delay_retries_connection_errors():
+    assert _retry_delay(ConnectionError("reset"), attempt=0) is not None
+    assert _retry_delay(httpx.ConnectError("refused"), attempt=0) is not None
+
+
+def test_retry_delay_gives_up_on_permanent_errors():
+    assert _retry_delay(make_status_error(401), attempt=0) is None
+    assert _retry_delay(make_status_error(400), attempt=0) is None
+    assert _retry_delay(ValueError("No valid messages to send"), attempt=0) is None
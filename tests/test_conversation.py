@@ -0,0 +1,39 @@
+"""Tests for the pure helpers in llm_chats.conversation."""
+from llm_chats.conversation import _keywords, _select_relevant_excerpts
+
+
+def test_keywords_splits_cjk_into_bigrams():
+    assert _keywords("缓存策略") == {"缓存", "存策", "策略"}
+
+
+def test_keywords_keeps_whole_words_of_three_or_more_chars():
+    assert _keywords("The KV cache is ok") == {"the", "cache"}
+
+
+def test_keywords_mixes_scripts():
+    assert _keywords("LRU缓存") == {"lru", "缓存"}
+
+
+def test_select_relevant_excerpts_keeps_document_order():
+    file_context = "缓存命中率很高。\n\n与主题无关的段落。\n\n缓存策略采用LRU。"
+    excerpts = _select_relevant_excerpts(file_context, "LRU缓存策略")
+    assert excerpts == "缓存命中率很高。\n\n缓存策略采用LRU。"
+
+
+def test_select_relevant_excerpts_skips_unrelated_paragraphs():
+    assert _select_relevant_excerpts("天气晴朗。\n\n适合出游。", "数据库索引") == ""
+
+
+def test_select_relevant_excerpts_respects_budget():
+    best = "缓存策略" * 10
+    other = "缓存" + "。" * 30
+    excerpts = _select_relevant_excerpts(f"{other}\n\n{best}", "缓存策略", budget=45)
+    # The best match fits; adding the other paragraph would exceed the budget
+    assert excerpts == best
+
+
+def test_select_relevant_excerpts_fills_budget_with_smaller_matches():
+    too_long = "缓存策略" * 20
+    short = "缓存很快。"
+    excerpts = _select_relevant_excerpts(f"{too_long}\n\n{short}", "缓存策略", budget=20)
+    assert excerpts == short